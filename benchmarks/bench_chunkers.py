@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Chunker benchmark: compares chunking strategies on the same corpus.
+
+For each strategy it reports chunks per MB of text, average chunk length and
+chunking speed, plus how many planted facts survive whole in at least one chunk
+(a model-free measure of how often chunk boundaries cut through a sentence).
+With --embed, the chunks are embedded through ollama (OLLAMA_HOST) to report
+embedding throughput, and each fact's question is searched exactly against
+them to report retrieval quality (hit@k and MRR of the chunk holding the fact).
+
+The corpus is synthetic by default (documents of filler sentences, each with
+planted facts); --corpus uses the supported files of a folder instead, without
+facts.
+
+    python benchmarks/bench_chunkers.py [--strategies char,sentence,token] [--docs 200]
+                                        [--corpus DIR] [--embed] [--k 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from extract.chunker import iter_spec_chunks, parse_chunk_spec  # noqa: E402
+
+WORDS = ("system report value process data file model result index query search store "
+         "network server client request response memory vector document page section "
+         "table record update delete insert error warning status level").split()
+ATTRIBUTES = ["access code", "owner", "release date", "budget", "error code", "ticket"]
+
+
+def make_corpus(docs: int, seed: int):
+    """Synthetic documents of filler paragraphs, each with planted (fact, question, answer) triples."""
+    rng = random.Random(seed)
+    texts, facts = [], []
+    for d in range(docs):
+        paragraphs = []
+        for p in range(rng.randint(5, 15)):
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                words = rng.choices(WORDS, k=rng.randint(6, 24))
+                sentences.append(" ".join(words).capitalize() + ".")
+            if rng.random() < 0.4:
+                attribute = rng.choice(ATTRIBUTES)
+                name = f"project {rng.choice(['Zephyr', 'Orion', 'Atlas', 'Nova'])}-{d}-{p}"
+                answer = f"{rng.randint(1000, 9999)}-{rng.choice(WORDS)}"
+                fact = f"The {attribute} of {name} is {answer}."
+                sentences.insert(rng.randrange(len(sentences) + 1), fact)
+                facts.append((fact, f"What is the {attribute} of {name}?", answer))
+            paragraphs.append(" ".join(sentences))
+        texts.append("\n\n".join(paragraphs))
+    return texts, facts
+
+
+def load_corpus(folder: str):
+    from extract.extractor import extract_text, is_supported
+    texts = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if is_supported(path):
+                try:
+                    texts.append(extract_text(path))
+                except Exception as e:
+                    print(f"skipping {path}: {e}", file=sys.stderr)
+    return texts, []
+
+
+def embed_all(texts, batch_size: int = 64, concurrency: int = 4):
+    from embedding.client import EmbeddingClient
+    client = EmbeddingClient("qllama/bge-m3", concurrency=concurrency, request_size=batch_size)
+    try:
+        futures = [client.submit(texts[i:i + batch_size * concurrency])
+                   for i in range(0, len(texts), batch_size * concurrency)]
+        return [vector for future in futures for vector in future.result()]
+    finally:
+        client.close()
+
+
+def bench(spec_text: str, texts, facts, embed: bool, k: int) -> dict:
+    spec = parse_chunk_spec(spec_text)
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 2 ** 20
+
+    start = time.perf_counter()
+    # pieces of 64KB, as extractors stream them
+    chunks = [chunk for text in texts
+              for chunk in iter_spec_chunks((text[i:i + 65536] for i in range(0, len(text), 65536)), spec)]
+    chunk_s = time.perf_counter() - start
+
+    result = {
+        'strategy': str(spec),
+        'chunks': len(chunks),
+        'chunks_per_mb': len(chunks) / megabytes if megabytes else 0.0,
+        'avg_chunk_chars': sum(map(len, chunks)) / len(chunks) if chunks else 0.0,
+        'chunking_mb_s': megabytes / chunk_s if chunk_s else 0.0,
+    }
+    if facts:
+        result['facts_whole'] = sum(any(fact in chunk for chunk in chunks) for fact, _, _ in facts) / len(facts)
+
+    if embed and chunks:
+        import numpy as np
+        from search.memory_index import normalize, top_k
+
+        start = time.perf_counter()
+        matrix = normalize(embed_all(chunks))
+        embed_s = time.perf_counter() - start
+        result['embed_chunks_s'] = len(chunks) / embed_s
+        result['embed_mb_s'] = megabytes / embed_s
+
+        if facts:
+            questions = normalize(embed_all([question for _, question, _ in facts]))
+            hits, reciprocal = 0, 0.0
+            for (_, _, answer), question in zip(facts, questions):
+                rows, _ = top_k(matrix, np.asarray(question), k)
+                ranks = [r for r, row in enumerate(rows, start=1) if answer in chunks[row]]
+                if ranks:
+                    hits += 1
+                    reciprocal += 1 / ranks[0]
+            result[f'hit@{k}'] = hits / len(facts)
+            result['mrr'] = reciprocal / len(facts)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategies", default="char,sentence,token",
+                        help="semicolon- or comma-separated chunk specs, e.g. 'char;sentence:1000:100;token:512'")
+    parser.add_argument("--docs", type=int, default=200, help="number of synthetic documents")
+    parser.add_argument("--corpus", help="folder to chunk instead of the synthetic corpus")
+    parser.add_argument("--embed", action="store_true", help="also embed through ollama and measure retrieval")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    texts, facts = load_corpus(args.corpus) if args.corpus else make_corpus(args.docs, args.seed)
+    separator = ";" if ";" in args.strategies else ","
+    results = [bench(spec.strip(), texts, facts, args.embed, args.k)
+               for spec in args.strategies.split(separator) if spec.strip()]
+
+    for r in results:
+        line = (f"{r['strategy']:<22} {r['chunks']:>7} chunks  {r['chunks_per_mb']:>8.1f}/MB  "
+                f"avg {r['avg_chunk_chars']:>6.0f} chars  {r['chunking_mb_s']:>6.1f} MB/s")
+        if 'facts_whole' in r:
+            line += f"  facts whole {r['facts_whole']:.3f}"
+        if 'embed_chunks_s' in r:
+            line += f"  embed {r['embed_chunks_s']:.1f} chunks/s"
+        if 'mrr' in r:
+            line += f"  hit@{args.k} {r[f'hit@{args.k}']:.3f}  mrr {r['mrr']:.3f}"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of ingest, search and database operations as the
+collection grows.
+
+Runs against a throwaway store in a temporary directory and the fake ollama
+server (fake_ollama.py: deterministic vectors, simulated latency), so it needs
+neither a model nor the user's data. The corpus (corpus.py) grows step by step
+to each size of --steps; at every step it measures:
+
+    ingest     - Ingestor.open_folder over the new files: files/s and chunks/s
+    search     - Embedder.search latency, p50 and p99 (query cache disabled)
+    check_key  - DbManager.checkKey latency, p50 and p99
+    delete     - DbManager.deleteByFile latency, p50 (the files are re-embedded next step)
+    stats      - Display.show_stats latency, p50
+
+Results can be saved with --json and compared against a saved run with
+--compare, which exits with status 1 when a metric regressed by more than
+--tolerance.
+
+    python benchmarks/bench_embed.py [--steps 100,400,1600] [--pdf-ratio 0.1] [--size-kb 8]
+                                     [--queries 50] [--latency-ms 0] [--per-text-ms 0]
+                                     [--workers 1] [--batch-size 64] [--json out.json]
+                                     [--compare baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import WORDS, generate_corpus  # noqa: E402
+from fake_ollama import FakeOllama  # noqa: E402
+
+# metrics where higher is better; every other metric is a latency
+THROUGHPUT = ("ingest_files_s", "ingest_chunks_s")
+
+
+def quiet():
+    """Silence carpet's progress prints while timing."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def timed(call, repeat: int = 1) -> list:
+    """Latencies of repeated calls, in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentiles(latencies: list, prefix: str) -> dict:
+    return {f"{prefix}_p50_ms": float(np.percentile(latencies, 50)),
+            f"{prefix}_p99_ms": float(np.percentile(latencies, 99))}
+
+
+def run(args) -> dict:
+    from database import setup_chroma_db
+
+    tmp = tempfile.TemporaryDirectory(prefix="carpet-bench-")
+    corpus_dir = os.path.join(tmp.name, "corpus")
+    # everything carpet stores (Chroma, manifest, caches, indexes) lives under CHROMA_PATH
+    setup_chroma_db.CHROMA_PATH = os.path.join(tmp.name, "store")
+
+    # one INFO line per model request otherwise
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeOllama(dim=args.dim, latency_ms=args.latency_ms, per_text_ms=args.per_text_ms).start()
+    os.environ["OLLAMA_HOST"] = fake.url
+
+    from database.db_manager import DbManager
+    from database.manifest import Manifest
+    from embedding.display import Display
+    from embedding.embedder import Embedder
+    from ingestion.ingestor import Ingestor
+
+    rng = random.Random(args.seed)
+    queries = [" ".join(rng.choices(WORDS, k=rng.randint(2, 6))) for _ in range(args.queries)]
+
+    steps, total = [], 0
+    try:
+        for size in args.steps:
+            new = size - total
+            pdf = round(new * args.pdf_ratio)
+            generate_corpus(corpus_dir, txt=new - pdf, pdf=pdf, size_kb=args.size_kb, seed=args.seed, start=total)
+            total = size
+
+            before = Manifest.totals()
+            # each step's ingestor and embedder are closed, so client threads and open
+            # cache files do not pile up over the sweep and skew later steps
+            ingestor = Ingestor(batch_size=args.batch_size, workers=args.workers, concurrency=args.concurrency)
+            try:
+                with quiet():
+                    ingest_s = timed(lambda: ingestor.open_folder(corpus_dir))[0] / 1000
+            finally:
+                ingestor.close()
+            after = Manifest.totals()
+            files = after.get('files', 0) - before.get('files', 0)
+            chunks = after.get('chunks', 0) - before.get('chunks', 0)
+
+            embedder = Embedder(query_cache_size=0, concurrency=args.concurrency)
+            try:
+                with quiet():
+                    embedder.search("warm up", 5)
+                    search = [timed(lambda: embedder.search(query, 5))[0] for query in queries]
+            finally:
+                embedder.close()
+
+            paths = rng.sample(ingestor.file_paths, min(50, len(ingestor.file_paths)))
+            check_key = [timed(lambda: DbManager.checkKey(path))[0] for path in paths]
+
+            display = Display()
+            with quiet():
+                stats = timed(display.show_stats, repeat=10)
+                delete = [timed(lambda: DbManager.deleteByFile(path))[0] for path in paths[:10]]
+
+            step = {
+                'files': size,
+                'chunks': after.get('chunks', 0),
+                'ingest_files_s': files / ingest_s if ingest_s else 0.0,
+                'ingest_chunks_s': chunks / ingest_s if ingest_s else 0.0,
+                **percentiles(search, "search"),
+                **percentiles(check_key, "check_key"),
+                'delete_p50_ms': float(np.percentile(delete, 50)),
+                'stats_p50_ms': float(np.percentile(stats, 50)),
+            }
+            steps.append(step)
+            print(f"{size:>7} files {step['chunks']:>8} chunks  "
+                  f"ingest {step['ingest_files_s']:>7.1f} files/s {step['ingest_chunks_s']:>8.1f} chunks/s  "
+                  f"search p50 {step['search_p50_ms']:>6.1f} p99 {step['search_p99_ms']:>6.1f} ms  "
+                  f"checkKey p50 {step['check_key_p50_ms']:>6.2f} ms  delete p50 {step['delete_p50_ms']:>6.1f} ms  "
+                  f"stats p50 {step['stats_p50_ms']:>6.2f} ms")
+    finally:
+        fake.stop()
+        if args.keep:
+            print(f"Kept the corpus and store in {tmp.name}")
+        else:
+            tmp.cleanup()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "compare", "keep")}
+    return {'config': config, 'steps': steps}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print each metric against the baseline step of the same size; return False on a regression."""
+    ok = True
+    previous = {step['files']: step for step in baseline.get('steps', [])}
+    for step in results['steps']:
+        base = previous.get(step['files'])
+        if base is None:
+            continue
+        for metric, value in step.items():
+            if metric in ('files', 'chunks') or not base.get(metric):
+                continue
+            change = value / base[metric] - 1
+            worse = -change if metric in THROUGHPUT else change
+            flag = "REGRESSION" if worse > tolerance else ""
+            ok = ok and not flag
+            print(f"{step['files']:>7} files  {metric:<18} {base[metric]:>10.2f} -> {value:>10.2f} "
+                  f"({change:+.0%}) {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", default="100,400,1600",
+                        type=lambda s: sorted(int(n) for n in s.split(",")),
+                        help="comma-separated corpus sizes (files) to measure at")
+    parser.add_argument("--pdf-ratio", type=float, default=0.1, help="share of the files that are PDFs")
+    parser.add_argument("--size-kb", type=float, default=8, help="approximate text size of each file")
+    parser.add_argument("--queries", type=int, default=50, help="search queries per step")
+    parser.add_argument("--dim", type=int, default=1024, help="dimension of the fake vectors")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake model time per request")
+    parser.add_argument("--per-text-ms", type=float, default=0.0, help="fake model time per text")
+    parser.add_argument("--workers", type=int, default=1, help="extraction processes")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown reported as a regression by --compare")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary corpus and store")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Search engine benchmark: exact in-memory top-k and its int8-quantized variant
+versus ChromaDB's HNSW index.
+
+For each size, synthetic clustered vectors (shaped like text embeddings: many
+near neighbours, normalized) are written to a memory-mapped float32 matrix, to
+int8 codes and to a ChromaDB collection in a temporary directory. The same
+queries are run on every engine, reporting recall@k against the exact answer
+and against the `collection.query` baseline, the median and p95 latency, how
+long building each took and how much memory the int8 codes save.
+
+    python benchmarks/bench_memory_search.py [--sizes 10000,100000,1000000] [--dim 1024]
+                                             [--queries 100] [--k 5] [--rerank 10] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from search.memory_index import (  # noqa: E402
+    MemoryIndex, normalize, quantization_scales, quantize, quantized_top_k, top_k
+)
+
+
+def make_vectors(count: int, dim: int, rng: np.random.Generator, clusters: int = 256) -> np.ndarray:
+    """Normalized vectors scattered around random cluster centres, generated in blocks."""
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    out = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 65536):
+        n = min(65536, count - start)
+        block = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+        out[start:start + n] = normalize(block)
+    return out
+
+
+def percentile(values, q: float) -> float:
+    return float(np.percentile(values, q))
+
+
+def bench(size: int, dim: int, queries: int, k: int, rerank: int, seed: int) -> dict:
+    import chromadb
+
+    rng = np.random.default_rng(seed)
+    vectors = make_vectors(size, dim, rng)
+    # queries: perturbed copies of stored vectors, so each has real neighbours
+    picks = rng.integers(0, size, queries)
+    query_vectors = normalize(vectors[picks] + 0.3 * rng.standard_normal((queries, dim), dtype=np.float32))
+
+    with tempfile.TemporaryDirectory(prefix="carpet-bench-") as tmp:
+        # memory engine: the same layout MemoryIndex keeps on disk
+        start = time.perf_counter()
+        path = os.path.join(tmp, "vectors.f32")
+        vectors.tofile(path)
+        matrix = np.memmap(path, dtype=np.float32, mode='r', shape=(size, dim))
+        memory_build = time.perf_counter() - start
+
+        exact, memory_ms = [], []
+        for q in query_vectors:
+            t = time.perf_counter()
+            rows, _ = top_k(matrix, q, k)
+            memory_ms.append((time.perf_counter() - t) * 1000)
+            exact.append(set(rows.tolist()))
+
+        # int8 engine: per-dimension scalar quantization, float32 re-ranking
+        start = time.perf_counter()
+        scales = quantization_scales(matrix)
+        codes = quantize(matrix, scales)
+        int8_build = time.perf_counter() - start
+
+        int8_found, int8_ms = [], []
+        for q in query_vectors:
+            t = time.perf_counter()
+            rows, _ = quantized_top_k(matrix, codes, scales, q, k, k * rerank)
+            int8_ms.append((time.perf_counter() - t) * 1000)
+            int8_found.append(set(rows.tolist()))
+
+        # HNSW engine: a ChromaDB collection with the store's default settings
+        client = chromadb.PersistentClient(path=os.path.join(tmp, "chroma"))
+        collection = client.get_or_create_collection(name="bench")
+        batch = client.get_max_batch_size()
+        start = time.perf_counter()
+        for i in range(0, size, batch):
+            part = vectors[i:i + batch]
+            collection.add(ids=[str(j) for j in range(i, i + len(part))], embeddings=part)
+        hnsw_build = time.perf_counter() - start
+
+        hnsw_found, hnsw_ms = [], []
+        for q in query_vectors:
+            t = time.perf_counter()
+            result = collection.query(query_embeddings=[q], n_results=k, include=[])
+            hnsw_ms.append((time.perf_counter() - t) * 1000)
+            hnsw_found.append({int(i) for i in result['ids'][0]})
+
+        del matrix
+
+    def recall(found, truth):
+        return sum(len(f & t) for f, t in zip(found, truth)) / (queries * k)
+
+    return {
+        'size': size,
+        'dim': dim,
+        'k': k,
+        'rerank': rerank,
+        'hnsw_recall': recall(hnsw_found, exact),
+        'memory_recall': 1.0,
+        'int8_recall': recall(int8_found, exact),
+        'int8_recall_vs_hnsw': recall(int8_found, hnsw_found),
+        'memory_p50_ms': statistics.median(memory_ms),
+        'memory_p95_ms': percentile(memory_ms, 95),
+        'int8_p50_ms': statistics.median(int8_ms),
+        'int8_p95_ms': percentile(int8_ms, 95),
+        'hnsw_p50_ms': statistics.median(hnsw_ms),
+        'hnsw_p95_ms': percentile(hnsw_ms, 95),
+        'memory_build_s': memory_build,
+        'int8_build_s': int8_build,
+        'hnsw_build_s': hnsw_build,
+        'matrix_mb': size * dim * 4 / 2 ** 20,
+        # the codes are scanned; float32 rows are only paged in for re-ranked candidates
+        'int8_mb': size * dim / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="comma-separated chunk counts (1000000 needs ~4GB of disk at dim 1024)")
+    parser.add_argument("--dim", type=int, default=1024, help="vector dimension (bge-m3 uses 1024)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank", type=int, default=MemoryIndex.RERANK_FACTOR,
+                        help="int8 candidates re-ranked at full precision, per result")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'chunks':>9} {'recall hnsw':>12} {'recall int8':>12} {'int8~hnsw':>10} "
+          f"{'p50 memory':>11} {'p50 int8':>9} {'p50 hnsw':>9} {'MB f32':>8} {'MB int8':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = bench(size, args.dim, args.queries, args.k, args.rerank, args.seed)
+        results.append(r)
+        print(f"{size:>9} {r['hnsw_recall']:>12.3f} {r['int8_recall']:>12.3f} {r['int8_recall_vs_hnsw']:>10.3f} "
+              f"{r['memory_p50_ms']:>9.2f}ms {r['int8_p50_ms']:>7.2f}ms {r['hnsw_p50_ms']:>7.2f}ms "
+              f"{r['matrix_mb']:>8.1f} {r['int8_mb']:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
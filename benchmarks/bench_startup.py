@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the carpet CLI.
+
+Times commands that never need the store or the model (usage errors), runs
+them under `python -X importtime` to list the slowest imports, and fails if
+one of them imports a heavy module or its median exceeds --max-ms, so startup
+regressions are caught.
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-ms 150] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPO, "main.py")
+
+# commands resolved without touching the store or the model
+LIGHT_COMMANDS = [
+    [],
+    ["unknown-command"],
+    ["search"],
+    ["delete"],
+]
+
+# modules that must stay out of light commands
+HEAVY_MODULES = ["chromadb", "ollama", "numpy", "PyPDF2", "httpx"]
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Map top-level module names to their cumulative import time in microseconds."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # nested imports are indented below the module that triggered them
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def run(args, runs: int) -> dict:
+    """Time a carpet command and collect its imports."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, *args], cwd=REPO, capture_output=True, check=False)
+        times.append((time.perf_counter() - start) * 1000)
+
+    proc = subprocess.run([sys.executable, "-X", "importtime", MAIN, *args],
+                          cwd=REPO, capture_output=True, text=True, check=False)
+    modules = parse_importtime(proc.stderr)
+    roots = {name.split(".")[0] for name in modules}
+
+    return {
+        'command': " ".join(args) or "(no args)",
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'heavy_imports': sorted(m for m in HEAVY_MODULES if m in roots),
+        'slowest_imports': sorted(modules.items(), key=lambda item: -item[1])[:5],
+    }
+
+
+def run_python_baseline(runs: int) -> float:
+    """Median startup time of a bare interpreter, in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per command")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a median exceeds this")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    # bare interpreter startup, to put the numbers in context
+    baseline = run_python_baseline(args.runs)
+    print(f"python -c pass: {baseline:.1f} ms")
+
+    results = [run(command, args.runs) for command in LIGHT_COMMANDS]
+    failed = False
+    for result in results:
+        print(f"\ncarpet {result['command']}: median {result['median_ms']:.1f} ms (min {result['min_ms']:.1f} ms)")
+        for name, cumulative_us in result['slowest_imports']:
+            print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+        if result['heavy_imports']:
+            print(f"   ❌ imports heavy modules: {', '.join(result['heavy_imports'])}")
+            failed = True
+        if args.max_ms is not None and result['median_ms'] > args.max_ms:
+            print(f"   ❌ slower than {args.max_ms:.0f} ms")
+            failed = True
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'python_ms': baseline, 'commands': results}, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
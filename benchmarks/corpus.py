@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus generator: text and PDF files of controllable count and size,
+for benchmarks and experiments.
+
+Documents are paragraphs of filler sentences drawn from a fixed vocabulary with
+a seeded generator, so the same arguments always produce the same files. PDFs
+are written directly (uncompressed text pages in the standard Helvetica font),
+without any PDF library.
+
+    python benchmarks/corpus.py OUT_DIR [--txt 100] [--pdf 10] [--size-kb 8] [--seed 0]
+"""
+import argparse
+import os
+import random
+from typing import List
+
+WORDS = ("system report value process data file model result index query search store "
+         "network server client request response memory vector document page section "
+         "table record update delete insert error warning status level cache batch "
+         "thread worker queue latency budget release owner ticket project").split()
+
+# layout of generated PDF pages
+LINE_CHARS = 90
+PAGE_LINES = 60
+
+
+def make_text(rng: random.Random, chars: int) -> str:
+    """Paragraphs of filler sentences, about `chars` characters long."""
+    paragraphs, total = [], 0
+    while total < chars:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(WORDS, k=rng.randint(6, 20))
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _wrap(text: str, width: int = LINE_CHARS) -> List[str]:
+    lines = []
+    for paragraph in text.split("\n\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.extend([line, ""])
+    return lines
+
+
+def write_pdf(path: str, text: str):
+    """Write text as a minimal PDF, one page per PAGE_LINES lines."""
+    lines = _wrap(text)
+    pages = [lines[i:i + PAGE_LINES] for i in range(0, len(lines), PAGE_LINES)] or [[]]
+
+    # objects 1-3: catalog, page tree, font; then a page and its content stream per page
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page)
+        stream = ("BT /F1 10 Tf 12 TL 50 790 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET")
+        stream = stream.encode("latin-1", errors="replace")
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {content_id} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(folder: str, txt: int = 100, pdf: int = 10, size_kb: float = 8, seed: int = 0,
+                    start: int = 0) -> List[str]:
+    """
+    Write `txt` text files and `pdf` PDF files of about `size_kb` KB of text each,
+    spread over subfolders of 100 files.
+
+    Args:
+        folder: Folder to write into (created if needed)
+        txt: Number of text files
+        pdf: Number of PDF files
+        size_kb: Approximate text size of each file, in KB
+        seed: Seed of the text generator
+        start: Index of the first file, to grow an existing corpus with new files
+
+    Returns:
+        Paths of the files written
+    """
+    paths = []
+    for i in range(start, start + txt + pdf):
+        # one generator per file, so a file's text does not depend on how many came before
+        rng = random.Random(f"{seed}-{i}")
+        subfolder = os.path.join(folder, f"part{i // 100:04d}")
+        os.makedirs(subfolder, exist_ok=True)
+        text = make_text(rng, int(size_kb * 1024))
+        if i - start < txt:
+            path = os.path.join(subfolder, f"doc{i:06d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            path = os.path.join(subfolder, f"doc{i:06d}.pdf")
+            write_pdf(path, text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out", help="folder to write the corpus into")
+    parser.add_argument("--txt", type=int, default=100, help="number of text files")
+    parser.add_argument("--pdf", type=int, default=10, help="number of PDF files")
+    parser.add_argument("--size-kb", type=float, default=8, help="approximate text size of each file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out, args.txt, args.pdf, args.size_kb, args.seed)
+    print(f"Wrote {len(paths)} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ollama embedding API, for benchmarks and experiments
+without a model.
+
+Vectors are deterministic (seeded by a hash of the text, normalized), so the
+same text always gets the same vector and runs are repeatable. The latency of
+a real model is simulated per request and per text. It answers
+`/api/embed` (what carpet uses), the older `/api/embeddings`, `/api/tags`
+(listing qllama/bge-m3) and `/api/version`.
+
+    python benchmarks/fake_ollama.py [--port 11434] [--dim 1024]
+                                     [--latency-ms 0] [--per-text-ms 0]
+
+Point carpet at it with OLLAMA_HOST=http://127.0.0.1:<port>, or start it
+in-process with FakeOllama(...).start() (see bench_embed.py).
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+MODEL = "qllama/bge-m3"
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector of a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeOllama:
+    """
+    Fake embedding server running in a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        dim: Vector dimension (bge-m3 has 1024)
+        latency_ms: Simulated time per request
+        per_text_ms: Simulated time per embedded text
+    """
+
+    def __init__(self, port: int = 0, dim: int = 1024, latency_ms: float = 0.0, per_text_ms: float = 0.0):
+        self.dim = dim
+        self.latency = latency_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self.requests = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._reply(200, {'models': [{'name': f"{MODEL}:latest", 'model': f"{MODEL}:latest"}]})
+                elif self.path == "/api/version":
+                    self._reply(200, {'version': "0.0.0-fake"})
+                elif self.path == "/":
+                    self._reply(200, {'status': "Ollama is running"})
+                else:
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/embed":
+                    texts = request.get('input', [])
+                    texts = [texts] if isinstance(texts, str) else texts
+                    body = {'model': request.get('model', MODEL),
+                            'embeddings': [fake_vector(text, fake.dim) for text in texts]}
+                elif self.path == "/api/embeddings":
+                    texts = [request.get('prompt', "")]
+                    body = {'embedding': fake_vector(texts[0], fake.dim)}
+                else:
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+                    return
+
+                with fake._lock:
+                    fake.requests += 1
+                    fake.texts += len(texts)
+                delay = fake.latency + fake.per_text * len(texts)
+                if delay:
+                    time.sleep(delay)
+                self._reply(200, body)
+
+        return Handler
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated time per request")
+    parser.add_argument("--per-text-ms", type=float, default=0.0, help="simulated time per embedded text")
+    args = parser.parse_args()
+
+    server = FakeOllama(args.port, args.dim, args.latency_ms, args.per_text_ms)
+    print(f"Fake ollama listening on {server.url} (dim {args.dim})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,28 @@
+import fnmatch
 import os
-from chromadb import PersistentClient
+from typing import List
+from database.lexical_index import LexicalIndex
+from database.manifest import Manifest
+from database.setup_chroma_db import get_client, get_collection
 
-# Load environment variables
 
 class DbManager:
     """static class for managing ChromaDB operations."""
     
-    _client = None
-    _collection = None
-    
     @staticmethod
     def _get_client():
-        """Initialize and return ChromaDB client (singleton pattern)."""
-        if DbManager._client is None:
-            home = os.path.expanduser("~")
-            # Use a fixed chroma store path (no dotenv/env lookup)
-            chroma_path = "chroma_store"
-
-            # If relative path, make it relative to home directory
-            if not chroma_path.startswith("/"):
-                chroma_path = os.path.join(home, chroma_path)
-            
-            DbManager._client = PersistentClient(path=chroma_path)
-        
-        return DbManager._client
+        """Return the ChromaDB client shared by the whole process."""
+        return get_client()
     
     @staticmethod
     def _get_collection():
         """Get or create the user_files collection."""
-        if DbManager._collection is None:
-            client = DbManager._get_client()
-            DbManager._collection = client.get_or_create_collection("user_files")
-        
-        return DbManager._collection
+        return get_collection()
     
     @staticmethod
     def checkKey(filepath: str) -> bool:
         """
-        Check if a key (document ID) exists in ChromaDB.
+        Check if a file has been embedded in ChromaDB.
         
         Args:
             filepath: The file path to check for existence
@@ -47,24 +32,14 @@ class DbManager:
         """
         try:
             collection = DbManager._get_collection()
-            #get all documents
-            results = collection.get()
-            
-            if not results['ids']:
-                return False
-            
-            #check if any document ID contains the filepath
-            for doc_id in results['ids']:
-                if filepath in doc_id:
-                    return True
+            #look up a single chunk by its source, without loading documents
+            results = collection.get(
+                where={"source": filepath},
+                limit=1,
+                include=[]
+            )
             
-            #also check metadata for exact source match
-            if results['metadatas']:
-                for metadata in results['metadatas']:
-                    if metadata and metadata.get('source') == filepath:
-                        return True
-            
-            return False
+            return bool(results['ids'])
             
         except Exception as e:
             print(f"Error checking key in ChromaDB: {e}")
@@ -81,25 +56,17 @@ class DbManager:
         """
         try:
             collection = DbManager._get_collection()
-            results = collection.get()
-            
-            if not results['ids']:
-                return {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []}
-            
-            # Filter results for this file
-            filtered = {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []}
+            results = collection.get(
+                where={"source": filepath},
+                include=["documents", "metadatas"]
+            )
             
-            for i, metadata in enumerate(results['metadatas']):
-                if metadata and metadata.get('source') == filepath:
-                    filtered['ids'].append(results['ids'][i])
-                    if results['documents']:
-                        filtered['documents'].append(results['documents'][i])
-                    if results['metadatas']:
-                        filtered['metadatas'].append(results['metadatas'][i])
-                    if results.get('embeddings'):
-                        filtered['embeddings'].append(results['embeddings'][i])
-            
-            return filtered
+            return {
+                'ids': results['ids'],
+                'documents': results['documents'] or [],
+                'metadatas': results['metadatas'] or [],
+                'embeddings': []
+            }
             
         except Exception as e:
             print(f"Error retrieving chunks: {e}")
@@ -118,11 +85,15 @@ class DbManager:
         """
         try:
             collection = DbManager._get_collection()
-            chunks = DbManager.get_chunks_by_file(filepath)
+            #only ids are loaded, to report how many chunks go away
+            ids = collection.get(where={"source": filepath}, include=[])['ids']
+            
+            Manifest.remove([filepath])
+            LexicalIndex.remove([filepath])
             
-            if chunks['ids']:
-                collection.delete(ids=chunks['ids'])
-                print(f"Deleted {len(chunks['ids'])} chunks for {filepath}")
+            if ids:
+                collection.delete(where={"source": filepath})
+                print(f"Deleted {len(ids)} chunks for {filepath}")
                 return True
             else:
                 print(f"No chunks found for {filepath}")
@@ -130,4 +101,100 @@ class DbManager:
                 
         except Exception as e:
             print(f"Error deleting chunks: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    @staticmethod
+    def deleteByFiles(filepaths: List[str], batch_size: int = 500) -> bool:
+        """
+        Delete all chunks of several files, filtering by source inside ChromaDB.
+        
+        Args:
+            filepaths: The file paths to delete chunks for
+            batch_size: Number of files per delete call
+            
+        Returns:
+            bool: True if deletion successful, False otherwise
+        """
+        try:
+            collection = DbManager._get_collection()
+            
+            for start in range(0, len(filepaths), batch_size):
+                batch = filepaths[start:start + batch_size]
+                collection.delete(where={"source": {"$in": batch}})
+                Manifest.remove(batch)
+                LexicalIndex.remove(batch)
+            
+            return True
+            
+        except Exception as e:
+            print(f"Error deleting chunks: {e}")
+            return False
+    
+    @staticmethod
+    def _untracked_sources(match, page_size: int = 1000) -> List[str]:
+        """
+        Find matching sources that only exist in ChromaDB (embedded before the manifest),
+        paging through chunk metadata. Skipped when the manifest accounts for every chunk.
+        
+        Args:
+            match: Predicate on a source path
+            page_size: Number of chunks fetched per request
+            
+        Returns:
+            List of matching source paths missing from the manifest
+        """
+        collection = DbManager._get_collection()
+        if collection.count() == Manifest.totals().get('chunks', 0):
+            return []
+        
+        sources = set()
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            for metadata in page['metadatas']:
+                source = (metadata or {}).get('source')
+                if source and match(source) and Manifest.get(source) is None:
+                    sources.add(source)
+            offset += len(page['ids'])
+        
+        return sorted(sources)
+    
+    @staticmethod
+    def deleteByFolder(folder: str) -> int:
+        """
+        Delete all chunks of every file below a folder.
+        
+        Args:
+            folder: Absolute folder path
+            
+        Returns:
+            int: Number of files deleted
+        """
+        prefix = folder.rstrip(os.sep) + os.sep
+        filepaths = Manifest.paths_under(folder)
+        filepaths += DbManager._untracked_sources(lambda source: source.startswith(prefix))
+        
+        if filepaths and DbManager.deleteByFiles(filepaths):
+            return len(filepaths)
+        return 0
+    
+    @staticmethod
+    def deleteByGlob(pattern: str) -> int:
+        """
+        Delete all chunks of every file matching a glob pattern.
+        As with fnmatch, `*` also matches path separators.
+        
+        Args:
+            pattern: Absolute glob pattern, e.g. /home/me/docs/*.pdf
+            
+        Returns:
+            int: Number of files deleted
+        """
+        filepaths = Manifest.paths_matching(pattern)
+        filepaths += DbManager._untracked_sources(lambda source: fnmatch.fnmatchcase(source, pattern))
+        
+        if filepaths and DbManager.deleteByFiles(filepaths):
+            return len(filepaths)
+        return 0
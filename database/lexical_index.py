@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+from typing import Iterable, List, Optional
+
+from database import setup_chroma_db
+
+
+class LexicalIndex:
+    """
+    static class keeping a BM25 full-text index (SQLite FTS5) of every stored chunk
+    next to the Chroma store, for exact terms that embeddings match poorly:
+    error codes, identifiers, ticket numbers.
+
+    Chunks are added when their batch is written to ChromaDB and removed with their
+    files, so the index follows the collection. A store that predates the index is
+    backfilled from ChromaDB on the first lexical query.
+    """
+
+    _conn = None
+
+    @staticmethod
+    def _get_connection() -> sqlite3.Connection:
+        """Open (and create if needed) the index database next to the Chroma store."""
+        if LexicalIndex._conn is None:
+            store_path = setup_chroma_db.CHROMA_PATH
+            os.makedirs(store_path, exist_ok=True)
+
+            conn = sqlite3.connect(os.path.join(store_path, "carpet_lexical.sqlite3"))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # chunk rows live in a plain table (indexed by source, for deletes) and the
+            # FTS5 table only holds the postings, reading text from it as external content
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    source TEXT NOT NULL,
+                    chunk_index INTEGER,
+                    document TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                    document, content='chunks', content_rowid='rowid',
+                    tokenize="unicode61 tokenchars '_'"
+                );
+                CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+                    INSERT INTO chunks_fts (rowid, document) VALUES (NEW.rowid, NEW.document);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+                    INSERT INTO chunks_fts (chunks_fts, rowid, document) VALUES ('delete', OLD.rowid, OLD.document);
+                END;
+                CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """)
+            conn.commit()
+            LexicalIndex._conn = conn
+
+        return LexicalIndex._conn
+
+    @staticmethod
+    def add(ids: List[str], documents: List[str], metadatas: List[dict]):
+        """Index chunks that were just written to ChromaDB (re-adding an id replaces it)."""
+        conn = LexicalIndex._get_connection()
+        conn.executemany("DELETE FROM chunks WHERE id = ?", ((chunk_id,) for chunk_id in ids))
+        conn.executemany(
+            "INSERT INTO chunks (id, source, chunk_index, document) VALUES (?, ?, ?, ?)",
+            ((chunk_id, metadata['source'], metadata.get('chunk_index'), document)
+             for chunk_id, document, metadata in zip(ids, documents, metadatas))
+        )
+        # an index that grew along with the store from its first chunk holds all of them:
+        # mark it built so the first lexical query does not re-index the whole collection
+        if conn.execute("SELECT 1 FROM meta WHERE name = 'built'").fetchone() is None:
+            indexed = conn.execute("SELECT count(*) FROM chunks").fetchone()[0]
+            if indexed >= setup_chroma_db.get_collection().count():
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('built', 1)")
+        conn.commit()
+
+    @staticmethod
+    def remove(paths: Iterable[str]):
+        """Drop the chunks of the given files."""
+        conn = LexicalIndex._get_connection()
+        conn.executemany("DELETE FROM chunks WHERE source = ?", ((p,) for p in paths))
+        conn.commit()
+
+    @staticmethod
+    def clear():
+        """Drop every chunk; the empty index matches an empty store."""
+        conn = LexicalIndex._get_connection()
+        conn.execute("DELETE FROM chunks")
+        conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('delete-all')")
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('built', 1)")
+        conn.commit()
+
+    @staticmethod
+    def rebuild(page_size: int = 1000) -> int:
+        """
+        Re-index every chunk of the collection, paging through ChromaDB.
+
+        Returns:
+            int: Number of chunks indexed
+        """
+        LexicalIndex.clear()
+        collection = setup_chroma_db.get_collection()
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            LexicalIndex.add(page['ids'], page['documents'], page['metadatas'])
+            offset += len(page['ids'])
+        return offset
+
+    @staticmethod
+    def ensure_built():
+        """Backfill the index once, for stores embedded before it existed."""
+        row = LexicalIndex._get_connection().execute("SELECT value FROM meta WHERE name = 'built'").fetchone()
+        if row is None:
+            # on stderr: `carpet search --file` writes JSON lines to stdout
+            print("🔤 Building the lexical index from the existing chunks...", file=sys.stderr)
+            LexicalIndex.rebuild()
+
+    @staticmethod
+    def match_expression(query_text: str) -> Optional[str]:
+        """
+        Turn free text into an FTS5 query matching any of its terms. Each
+        whitespace-separated term is quoted as a phrase, so `ERR-404` or
+        `get_chunks_by_file` match as written and FTS5 operators are never parsed.
+        """
+        terms = [term.replace('"', '""') for term in query_text.split() if re.search(r'\w', term)]
+        return " OR ".join(f'"{term}"' for term in terms) or None
+
+    @staticmethod
+    def query(query_text: str, n_results: int = 5, exclude: Iterable[str] = ()) -> dict:
+        """
+        Find the chunks that best match a query's terms, by BM25.
+
+        Args:
+            query_text: The text query to search for
+            n_results: Number of chunks to return
+            exclude: Files whose chunks are left out (those still being written)
+
+        Returns:
+            dict: Results shaped like a ChromaDB query, without distances (None)
+        """
+        LexicalIndex.ensure_built()
+        expression = LexicalIndex.match_expression(query_text)
+        rows = []
+        if expression:
+            rows = LexicalIndex._get_connection().execute(
+                "SELECT c.id, c.source, c.chunk_index, c.document FROM chunks_fts "
+                "JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? AND c.source NOT IN (SELECT value FROM json_each(?)) "
+                "ORDER BY bm25(chunks_fts) LIMIT ?",
+                (expression, json.dumps(list(exclude)), n_results)
+            ).fetchall()
+
+        return {
+            'ids': [[row[0] for row in rows]],
+            'distances': [[None] * len(rows)],
+            'documents': [[row[3] for row in rows]],
+            'metadatas': [[{'source': row[1], 'chunk_index': row[2]} for row in rows]],
+        }
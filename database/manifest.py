@@ -0,0 +1,281 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+from database import setup_chroma_db
+
+
+class Manifest:
+    """static class tracking the fingerprint of every embedded file in a sidecar SQLite table."""
+
+    _conn = None
+
+    @staticmethod
+    def _get_connection() -> sqlite3.Connection:
+        """Open (and create if needed) the manifest database next to the Chroma store."""
+        if Manifest._conn is None:
+            store_path = setup_chroma_db.CHROMA_PATH
+            os.makedirs(store_path, exist_ok=True)
+
+            conn = sqlite3.connect(os.path.join(store_path, "carpet_manifest.sqlite3"))
+            conn.row_factory = sqlite3.Row
+            # WAL keeps per-file commits cheap during large embed runs
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    char_count INTEGER NOT NULL DEFAULT 0,
+                    chunker TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            # manifests created before char_count and the chunker were tracked
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(files)")}
+            if 'char_count' not in columns:
+                conn.execute("ALTER TABLE files ADD COLUMN char_count INTEGER NOT NULL DEFAULT 0")
+            if 'chunker' not in columns:
+                conn.execute("ALTER TABLE files ADD COLUMN chunker TEXT NOT NULL DEFAULT ''")
+
+            # files whose chunks are being written: hidden from searches until recorded,
+            # and cleaned up by the next run if the process dies first
+            conn.execute("CREATE TABLE IF NOT EXISTS pending (path TEXT PRIMARY KEY)")
+
+            # embed runs in progress and the files they finished, for --resume
+            conn.execute("CREATE TABLE IF NOT EXISTS runs (root TEXT PRIMARY KEY, started REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS journal (path TEXT PRIMARY KEY)")
+
+            # generation counter, bumped whenever embedded content changes
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0)")
+
+            # running totals over all files, kept up to date by triggers
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) SELECT 'files', COUNT(*) FROM files")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) SELECT 'chunks', COALESCE(SUM(chunk_count), 0) FROM files")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) SELECT 'chars', COALESCE(SUM(char_count), 0) FROM files")
+            conn.executescript("""
+                CREATE TRIGGER IF NOT EXISTS files_totals_insert AFTER INSERT ON files BEGIN
+                    UPDATE meta SET value = value + 1 WHERE name = 'files';
+                    UPDATE meta SET value = value + NEW.chunk_count WHERE name = 'chunks';
+                    UPDATE meta SET value = value + NEW.char_count WHERE name = 'chars';
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_totals_delete AFTER DELETE ON files BEGIN
+                    UPDATE meta SET value = value - 1 WHERE name = 'files';
+                    UPDATE meta SET value = value - OLD.chunk_count WHERE name = 'chunks';
+                    UPDATE meta SET value = value - OLD.char_count WHERE name = 'chars';
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_totals_update AFTER UPDATE OF chunk_count, char_count ON files BEGIN
+                    UPDATE meta SET value = value + NEW.chunk_count - OLD.chunk_count WHERE name = 'chunks';
+                    UPDATE meta SET value = value + NEW.char_count - OLD.char_count WHERE name = 'chars';
+                END;
+            """)
+            conn.commit()
+            Manifest._conn = conn
+
+        return Manifest._conn
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+
+    @staticmethod
+    def generation() -> int:
+        """
+        Get the store generation, which changes every time files are embedded or deleted.
+        Long-running readers compare it to know when their view of the store is stale.
+        """
+        row = Manifest._get_connection().execute(
+            "SELECT value FROM meta WHERE name = 'generation'"
+        ).fetchone()
+        return row['value']
+
+    @staticmethod
+    def totals() -> dict:
+        """
+        Get the number of files, chunks and characters recorded in the manifest,
+        from running totals rather than a scan.
+        """
+        rows = Manifest._get_connection().execute(
+            "SELECT name, value FROM meta WHERE name IN ('files', 'chunks', 'chars')"
+        ).fetchall()
+        return {row['name']: row['value'] for row in rows}
+
+    @staticmethod
+    def get(path: str) -> Optional[dict]:
+        """
+        Get the manifest entry for a file.
+
+        Args:
+            path: Absolute path of the file
+
+        Returns:
+            dict with size, mtime_ns, content_hash, chunk_count, char_count, model and chunker
+            (empty for files recorded before it was tracked), or None if not recorded
+        """
+        row = Manifest._get_connection().execute(
+            "SELECT * FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def content_hashes() -> dict:
+        """Map every recorded file to its content hash."""
+        rows = Manifest._get_connection().execute("SELECT path, content_hash FROM files").fetchall()
+        return {row['path']: row['content_hash'] for row in rows}
+
+    @staticmethod
+    def record(path: str, size: int, mtime_ns: int, content_hash: str, chunk_count: int, model: str,
+               char_count: int = 0, chunker: str = ''):
+        """
+        Insert or replace the fingerprint of a fully embedded file, making its chunks
+        visible and checkpointing it in the journal of a run in progress.
+        """
+        conn = Manifest._get_connection()
+        # an upsert rather than INSERT OR REPLACE, so the totals triggers see an update
+        conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, content_hash, chunk_count, model, char_count, chunker) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+            "content_hash = excluded.content_hash, chunk_count = excluded.chunk_count, "
+            "model = excluded.model, char_count = excluded.char_count, chunker = excluded.chunker",
+            (path, size, mtime_ns, content_hash, chunk_count, model, char_count, chunker)
+        )
+        conn.execute("DELETE FROM pending WHERE path = ?", (path,))
+        conn.execute("INSERT OR IGNORE INTO journal (path) SELECT ? WHERE EXISTS (SELECT 1 FROM runs)", (path,))
+        Manifest._bump(conn)
+        conn.commit()
+
+    @staticmethod
+    def touch(path: str, size: int, mtime_ns: int):
+        """Refresh the stat fields of a file whose content did not change."""
+        conn = Manifest._get_connection()
+        conn.execute(
+            "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+            (size, mtime_ns, path)
+        )
+        conn.commit()
+
+    @staticmethod
+    def remove(paths: Iterable[str]):
+        """Forget the given files."""
+        conn = Manifest._get_connection()
+        paths = list(paths)
+        conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in paths))
+        conn.executemany("DELETE FROM pending WHERE path = ?", ((p,) for p in paths))
+        Manifest._bump(conn)
+        conn.commit()
+
+    @staticmethod
+    def paths_under(folder: str) -> List[str]:
+        """
+        List every recorded file below a folder.
+
+        Args:
+            folder: Absolute folder path
+
+        Returns:
+            List of recorded file paths inside the folder (recursively)
+        """
+        rows = Manifest._get_connection().execute(
+            "SELECT path FROM files WHERE path >= ? AND path < ?", Manifest._range(folder)
+        ).fetchall()
+        return [row['path'] for row in rows]
+
+    @staticmethod
+    def _range(folder: str) -> Tuple[str, str]:
+        """Bounds of the paths inside a folder, for a range scan on a path primary key."""
+        prefix = folder.rstrip(os.sep) + os.sep
+        # every string starting with prefix sorts between prefix and prefix
+        # with its last character incremented
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    @staticmethod
+    def mark_pending(path: str):
+        """Note that the chunks of a file are being written; see record()."""
+        conn = Manifest._get_connection()
+        conn.execute("INSERT OR IGNORE INTO pending (path) VALUES (?)", (path,))
+        conn.commit()
+
+    @staticmethod
+    def pending(folder: Optional[str] = None) -> List[str]:
+        """List the files whose chunks are not all written (inside a folder, if given)."""
+        conn = Manifest._get_connection()
+        if folder is None:
+            rows = conn.execute("SELECT path FROM pending").fetchall()
+        else:
+            rows = conn.execute("SELECT path FROM pending WHERE path >= ? AND path < ?",
+                                Manifest._range(folder)).fetchall()
+        return [row['path'] for row in rows]
+
+    @staticmethod
+    def start_run(root: str, resume: bool = False) -> Optional[Set[str]]:
+        """
+        Start journaling an embed run of a folder.
+
+        Args:
+            root: Absolute folder path
+            resume: Continue the interrupted run of this folder instead of starting afresh
+
+        Returns:
+            The files the interrupted run finished, or None if there is no run to resume
+        """
+        conn = Manifest._get_connection()
+        lower, upper = Manifest._range(root)
+        if resume and conn.execute("SELECT 1 FROM runs WHERE root = ?", (root,)).fetchone():
+            rows = conn.execute("SELECT path FROM journal WHERE path >= ? AND path < ?", (lower, upper)).fetchall()
+            return {row['path'] for row in rows}
+
+        conn.execute("DELETE FROM journal WHERE path >= ? AND path < ?", (lower, upper))
+        conn.execute("INSERT OR REPLACE INTO runs (root, started) VALUES (?, ?)", (root, time.time()))
+        conn.commit()
+        return None
+
+    @staticmethod
+    def finish_run(root: str):
+        """Close the run of a folder once every file was processed, dropping its journal."""
+        conn = Manifest._get_connection()
+        conn.execute("DELETE FROM runs WHERE root = ?", (root,))
+        conn.execute("DELETE FROM journal WHERE path >= ? AND path < ?", Manifest._range(root))
+        conn.commit()
+
+    @staticmethod
+    def paths_matching(pattern: str) -> List[str]:
+        """
+        List every recorded file matching a glob pattern (SQLite GLOB: `*`, `?`, `[...]`,
+        case-sensitive, `*` also matching path separators).
+
+        Args:
+            pattern: Glob pattern on absolute paths
+
+        Returns:
+            List of matching file paths
+        """
+        rows = Manifest._get_connection().execute(
+            "SELECT path FROM files WHERE path GLOB ?", (pattern,)
+        ).fetchall()
+        return [row['path'] for row in rows]
+
+    @staticmethod
+    def clear():
+        """Forget every file."""
+        conn = Manifest._get_connection()
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM pending")
+        conn.execute("DELETE FROM journal")
+        Manifest._bump(conn)
+        conn.commit()
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """Return the sha256 hex digest of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,13 +1,73 @@
 import os
-from chromadb import PersistentClient
+import sys
+
+# GLOBAL DB in home directory
+CHROMA_PATH = os.path.join(os.path.expanduser("~"), "chroma_store")
+COLLECTION_NAME = "user_files"
+
+# client and collection shared by Embedder, Display and DbManager
+_client = None
+_collection = None
 
 
 def setup_chroma(path: str):
     """Create persistent ChromaDB at `path` if it doesn't exist, and return client + collection."""
+    from chromadb import PersistentClient
+
     if not os.path.exists(path):
         os.makedirs(path)
 
     client = PersistentClient(path=path)
-    collection = client.get_or_create_collection("user_files")
-    print(f"ChromaDB initialized at: {os.path.abspath(path)}")
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+    print(f"ChromaDB initialized at: {os.path.abspath(path)}", file=sys.stderr)
     return client, collection
+
+
+def get_client():
+    """
+    Return the process-wide ChromaDB client, creating the store on first use.
+    chromadb is only imported here, so commands that never touch the store start fast.
+    """
+    global _client, _collection
+    if _client is None:
+        if not os.path.exists(CHROMA_PATH) or not os.listdir(CHROMA_PATH):
+            _client, _collection = setup_chroma(CHROMA_PATH)
+        else:
+            from chromadb import PersistentClient
+            _client = PersistentClient(path=CHROMA_PATH)
+    return _client
+
+
+def get_collection():
+    """Return the process-wide user_files collection."""
+    global _collection
+    if _collection is None:
+        _collection = get_client().get_or_create_collection(COLLECTION_NAME)
+    return _collection
+
+
+def reload_collection():
+    """
+    Reopen the shared client and collection, picking up chunks written or deleted
+    by other processes since the store was opened.
+    """
+    global _client, _collection
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    # clients on the same path share a cached system holding the loaded index
+    SharedSystemClient.clear_system_cache()
+    _client = None
+    _collection = None
+    return get_collection()
+
+
+def reset_collection():
+    """
+    Drop the collection and create it again empty, which is much cheaper than
+    deleting every chunk by id.
+    """
+    global _collection
+    client = get_client()
+    client.delete_collection(COLLECTION_NAME)
+    _collection = client.get_or_create_collection(COLLECTION_NAME)
+    return _collection
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from database import setup_chroma_db
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of embedding vectors keyed by the hash of the embedded text.
+
+    Vectors live in a memory-mapped float32 array, one row per slot; a SQLite table
+    maps text hashes to slots and tracks when each entry was last used so the least
+    recently used entries are overwritten once the cache holds `max_entries` vectors.
+    Each model gets its own cache directory, since vectors of different models are
+    not interchangeable.
+    """
+
+    # number of slots added to the vector file each time it grows
+    GROW_STEP = 4096
+
+    def __init__(self, model: str, max_entries: int = 100_000, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = os.path.join(setup_chroma_db.CHROMA_PATH, "embedding_cache")
+
+        self.model = model
+        self.max_entries = max_entries
+        self.path = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9._-]', '_', model))
+        os.makedirs(self.path, exist_ok=True)
+
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite3"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER NOT NULL UNIQUE,
+                last_used INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim: Optional[int] = row[0] if row else None
+        self._vectors: Optional[np.memmap] = None
+        if self.dim is not None:
+            self._open_vectors()
+            self._shrink()
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Return the cache key of a text."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _capacity(self) -> int:
+        """Number of slots the vector file currently holds."""
+        if self.dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self.dim * 4)
+
+    def _open_vectors(self):
+        capacity = self._capacity()
+        self._vectors = None
+        if capacity:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+    def _shrink(self):
+        """
+        Fit a cache built with a larger `max_entries` into the current one: the most
+        recently used entries are kept, those in slots past the limit are moved down
+        into free slots, and the vector file is truncated.
+        """
+        if self.max_entries <= 0 or self._capacity() <= self.max_entries:
+            return
+
+        rows = self._conn.execute("SELECT key, slot FROM entries ORDER BY last_used DESC").fetchall()
+        kept, dropped = rows[:self.max_entries], rows[self.max_entries:]
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", ((k,) for k, _ in dropped))
+
+        used = {slot for _, slot in kept if slot < self.max_entries}
+        free = (slot for slot in range(self.max_entries) if slot not in used)
+        moves = [(k, slot, next(free)) for k, slot in kept if slot >= self.max_entries]
+        for _, old, new in moves:
+            self._vectors[new] = self._vectors[old]
+        self._vectors.flush()
+        self._conn.executemany("UPDATE entries SET slot = ? WHERE key = ?", ((new, k) for k, _, new in moves))
+        self._conn.commit()
+
+        self._vectors = None
+        with open(self._vectors_path, 'r+b') as f:
+            f.truncate(self.max_entries * self.dim * 4)
+        self._open_vectors()
+
+    def _ensure_capacity(self, slots: int):
+        """Grow the vector file so it holds at least `slots` rows."""
+        capacity = self._capacity()
+        if slots <= capacity:
+            return
+        capacity = max(slots, min(self.max_entries, capacity + self.GROW_STEP))
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open_vectors()
+
+    def _lookup(self, keys: Sequence[str]) -> dict:
+        """Map the given keys to their slots, leaving out keys that are not cached."""
+        slots = {}
+        unique = list(set(keys))
+        # stay below SQLite's bound parameter limit
+        for start in range(0, len(unique), 500):
+            part = unique[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            slots.update(rows)
+        return slots
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            texts: The texts to look up
+
+        Returns:
+            List with the cached vector of each text, or None where the text is not cached
+        """
+        if self._vectors is None or not texts:
+            return [None] * len(texts)
+
+        keys = [self.key(text) for text in texts]
+        slots = self._lookup(keys)
+
+        if slots:
+            now = time.time_ns()
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?", ((now, k) for k in slots)
+            )
+            self._conn.commit()
+
+        return [self._vectors[slots[k]].tolist() if k in slots else None for k in keys]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """
+        Store vectors, evicting the least recently used entries when the cache is full.
+
+        Args:
+            texts: The embedded texts
+            vectors: Their embedding vectors, in the same order
+        """
+        if not texts or self.max_entries <= 0:
+            return
+
+        if self.dim is None:
+            self.dim = len(vectors[0])
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (self.dim,))
+
+        new = {}
+        for text, vector in zip(texts, vectors):
+            new[self.key(text)] = vector
+        for k in self._lookup(list(new)):
+            del new[k]
+        # never store more than the cache can hold
+        items = list(new.items())[-self.max_entries:]
+        if not items:
+            self._conn.commit()
+            return
+
+        next_slot = self._conn.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()[0]
+        free = list(range(next_slot, min(self.max_entries, next_slot + len(items))))
+
+        # reuse the slots of the least recently used entries for the rest
+        evict = len(items) - len(free)
+        if evict > 0:
+            rows = self._conn.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (evict,)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", ((k,) for k, _ in rows))
+            free.extend(slot for _, slot in rows)
+
+        self._ensure_capacity(max(free) + 1)
+        now = time.time_ns()
+        for (_, vector), slot in zip(items, free):
+            self._vectors[slot] = vector
+        self._vectors.flush()
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+            ((k, slot, now) for (k, _), slot in zip(items, free))
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Flush the vector file and close the index."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._conn.close()
@@ -0,0 +1,91 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+import httpx
+import ollama
+
+from profiling import metrics
+
+
+class EmbeddingClient:
+    """
+    Concurrent ollama embedding client.
+
+    Requests are sent with ollama.AsyncClient from an event loop running in a background
+    thread, so callers can keep several batches in flight through submit() while they
+    prepare the next ones. A semaphore caps the number of concurrent requests (match it
+    to the server's OLLAMA_NUM_PARALLEL), the underlying httpx pool keeps that many
+    keep-alive connections open, and transient failures are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(self, model: str, concurrency: int = 4, request_size: int = 64,
+                 retries: int = 3, backoff: float = 0.5, host: Optional[str] = None):
+        self.model = model
+        self.concurrency = max(concurrency, 1)
+        self.request_size = max(request_size, 1)
+        self.retries = retries
+        self.backoff = backoff
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="embedding-client", daemon=True)
+        self._thread.start()
+
+        # the client and semaphore must be created on the loop that uses them
+        asyncio.run_coroutine_threadsafe(self._setup(host), self._loop).result()
+
+    async def _setup(self, host: Optional[str]):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._client = ollama.AsyncClient(host=host, limits=limits)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Check if a failed request is worth retrying."""
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, (ConnectionError, httpx.TransportError))
+
+    async def _request(self, texts: Sequence[str]) -> List[List[float]]:
+        """Send one embed request, retrying transient failures."""
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    with metrics.timer("embed.request"):
+                        response = await self._client.embed(model=self.model, input=list(texts))
+                    return response['embeddings']
+                except Exception as e:
+                    if attempt == self.retries or not self._is_transient(e):
+                        raise
+                # full jitter: sleep a random time up to the exponential backoff
+                await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    async def _embed(self, texts: Sequence[str]) -> List[List[float]]:
+        parts = [texts[i:i + self.request_size] for i in range(0, len(texts), self.request_size)]
+        results = await asyncio.gather(*(self._request(part) for part in parts))
+        return [vector for result in results for vector in result]
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """
+        Start embedding texts without waiting for the result.
+
+        Args:
+            texts: The texts to embed, split into requests of at most request_size texts
+
+        Returns:
+            Future resolving to the embedding vectors, in the same order as texts
+        """
+        return asyncio.run_coroutine_threadsafe(self._embed(texts), self._loop)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed texts and wait for the vectors."""
+        return self.submit(texts).result()
+
+    def close(self):
+        """Close the connection pool and stop the background loop."""
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -1,101 +1,134 @@
-import os
-from chromadb import PersistentClient
-from typing import Optional
+from typing import List, Optional
+from database.lexical_index import LexicalIndex
+from database.manifest import Manifest
+from database.setup_chroma_db import get_client, get_collection, reset_collection
 
 
 class Display:
     
     def __init__(self):
-        """Initialize ChromaDB client."""
-        home = os.path.expanduser("~")
-        # Use fixed chroma store path instead of reading from environment
-        chroma_path = os.path.join(home, "chroma_store")
-        if not chroma_path.startswith("/"):
-            chroma_path = os.path.join(home, chroma_path.lstrip("./"))
+        """Use the shared ChromaDB client."""
+        self.client = get_client()
+        self.collection = get_collection()
+    
+    def _iter_pages(self, include: List[str], source: Optional[str] = None,
+                    limit: Optional[int] = None, offset: int = 0, page_size: int = 1000):
+        """
+        Page through the collection, fetching only the requested fields.
+        
+        Args:
+            include: Fields to fetch ("documents", "metadatas")
+            source: Only chunks of this source file
+            limit: Maximum number of chunks, None for all
+            offset: Number of chunks to skip
+            page_size: Number of chunks fetched per request
+            
+        Yields:
+            ChromaDB get results, one page at a time
+        """
+        where = {"source": source} if source else None
+        remaining = limit
         
-        self.client = PersistentClient(path=chroma_path)
-        self.collection = self.client.get_or_create_collection("user_files")
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = self.collection.get(where=where, include=include, limit=size, offset=offset)
+            if not page['ids']:
+                return
+            
+            yield page
+            
+            offset += len(page['ids'])
+            if remaining is not None:
+                remaining -= len(page['ids'])
+            if len(page['ids']) < size:
+                return
     
-    def show_all(self):
-        """Display all documents in ChromaDB with their metadata."""
+    def show_all(self, limit: Optional[int] = None, offset: int = 0, source: Optional[str] = None):
+        """
+        Display documents in ChromaDB with their metadata, streamed page by page.
+        
+        Args:
+            limit: Maximum number of chunks to show, None for all
+            offset: Number of chunks to skip
+            source: Only show chunks of this source file
+        """
         try:
-            # Get all documents from the collection
-            results = self.collection.get()
-            
-            if not results['ids']:
+            total = self.collection.count()
+            if not total:
                 print("📦 ChromaDB is empty. No documents found.")
                 return
             
-            total_docs = len(results['ids'])
-            # Compute total unique source files (if metadata is present)
-            total_files = 0
-            if results.get('metadatas'):
-                total_files = len({m.get('source', 'Unknown') for m in results['metadatas'] if m})
-
-            print(f"📊 ChromaDB Contents ({total_files} files, {total_docs} chunks)")
+            totals = Manifest.totals()
+            print(f"📊 ChromaDB Contents ({totals.get('files', 0)} files, {total} chunks)")
             print("=" * 80)
             
-            # Group by source file
-            sources = {}
-            for i, doc_id in enumerate(results['ids']):
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                source = metadata.get('source', 'Unknown')
-                
-                if source not in sources:
-                    sources[source] = []
-                
-                sources[source].append({
-                    'id': doc_id,
-                    'document': results['documents'][i] if results['documents'] else None,
-                    'metadata': metadata
-                })
-            
-            # Display grouped by source
-            for source, chunks in sources.items():
-                print(f"\n📄 Source: {source}")
-                print(f"   Chunks: {len(chunks)}")
-                print("-" * 80)
-                
-                for chunk in chunks:
-                    chunk_idx = chunk['metadata'].get('chunk_index', 'N/A')
-                    total_chunks = chunk['metadata'].get('total_chunks', 'N/A')
-                    doc_preview = chunk['document'][:100] if chunk['document'] else "No content"
+            shown = 0
+            sources = set()
+            current = None
+            entry = None
+            
+            # chunks of a file are stored together, so a new source starts a new group
+            for page in self._iter_pages(["documents", "metadatas"], source, limit, offset):
+                for i, doc_id in enumerate(page['ids']):
+                    metadata = page['metadatas'][i] or {}
+                    document = page['documents'][i]
+                    chunk_source = metadata.get('source', 'Unknown')
+                    
+                    if chunk_source != current:
+                        current = chunk_source
+                        sources.add(chunk_source)
+                        # chunk counts are kept in the manifest
+                        entry = Manifest.get(chunk_source)
+                        print(f"\n📄 Source: {chunk_source}")
+                        if entry:
+                            print(f"   Chunks: {entry['chunk_count']}")
+                        print("-" * 80)
+                    
+                    chunk_idx = metadata.get('chunk_index', 'N/A')
+                    total_chunks = metadata.get('total_chunks', entry['chunk_count'] if entry else 'N/A')
+                    doc_preview = document[:100] if document else "No content"
                     
                     print(f"\n   Chunk {chunk_idx + 1}/{total_chunks}")
-                    print(f"   ID: {chunk['id']}")
+                    print(f"   ID: {doc_id}")
                     print(f"   Preview: {doc_preview}...")
+                    shown += 1
+            
+            if not shown:
+                print("\n📦 No documents match.")
+                return
             
             print("\n" + "=" * 80)
-            print(f"Total: {total_docs} chunks from {len(sources)} source(s)")
+            print(f"Total: {shown} chunks from {len(sources)} source(s)")
             
         except Exception as e:
             print(f"❌ Error displaying ChromaDB contents: {e}")
     
-    def show_sources(self):
-        """Display just the list of source files."""
+    def show_sources(self, source: Optional[str] = None):
+        """
+        Display just the list of source files, paging through chunk metadata only.
+        
+        Args:
+            source: Only count chunks of this source file
+        """
         try:
-            results = self.collection.get()
+            # Count chunks per source
+            chunk_counts = {}
+            
+            for page in self._iter_pages(["metadatas"], source):
+                for metadata in page['metadatas']:
+                    if metadata:
+                        chunk_source = metadata.get('source', 'Unknown')
+                        chunk_counts[chunk_source] = chunk_counts.get(chunk_source, 0) + 1
             
-            if not results['ids']:
+            if not chunk_counts:
                 print("\n📦 No documents found in ChromaDB.")
                 return
             
-            # Extract unique sources
-            sources = set()
-            chunk_counts = {}
-            
-            for i, metadata in enumerate(results['metadatas']):
-                if metadata:
-                    source = metadata.get('source', 'Unknown')
-                    sources.add(source)
-                    chunk_counts[source] = chunk_counts.get(source, 0) + 1
-            
-            print(f"\n📚 Source Files in ChromaDB ({len(sources)} files)")
+            print(f"\n📚 Source Files in ChromaDB ({len(chunk_counts)} files)")
             print("=" * 80)
             
-            for source in sorted(sources):
-                chunks = chunk_counts.get(source, 0)
-                print(f"   • {source} ({chunks} chunks)")
+            for chunk_source in sorted(chunk_counts):
+                print(f"   • {chunk_source} ({chunk_counts[chunk_source]} chunks)")
             
             print("=" * 80)
             
@@ -103,33 +136,30 @@ class Display:
             print(f"❌ Error listing sources: {e}")
     
     def show_stats(self):
-        """Display statistics about ChromaDB."""
+        """Display statistics about ChromaDB, from the manifest's running totals."""
         try:
-            results = self.collection.get()
+            total_chunks = self.collection.count()
             
-            if not results['ids']:
+            if not total_chunks:
                 print("\n📦 ChromaDB is empty.")
                 return
             
             # Calculate statistics
-            total_chunks = len(results['ids'])
-            sources = set()
-            total_chars = 0
-            
-            for i, metadata in enumerate(results['metadatas']):
-                if metadata:
-                    sources.add(metadata.get('source', 'Unknown'))
-                if results['documents'] and results['documents'][i]:
-                    total_chars += len(results['documents'][i])
+            totals = Manifest.totals()
+            tracked_chunks = totals.get('chunks', 0)
+            total_chars = totals.get('chars', 0)
             
-            avg_chunk_size = total_chars / total_chunks if total_chunks > 0 else 0
+            avg_chunk_size = total_chars / tracked_chunks if tracked_chunks > 0 else 0
             
             print(f"\n📈 ChromaDB Statistics")
             print("=" * 80)
             print(f"   Total Chunks: {total_chunks}")
-            print(f"   Unique Files: {len(sources)}")
+            print(f"   Unique Files: {totals.get('files', 0)}")
             print(f"   Total Characters: {total_chars:,}")
             print(f"   Avg Chunk Size: {avg_chunk_size:.0f} characters")
+            if total_chunks != tracked_chunks:
+                # e.g. chunks embedded before the manifest existed
+                print(f"   Untracked Chunks: {total_chunks - tracked_chunks} (run `carpet embed` to refresh)")
             print("=" * 80)
             
         except Exception as e:
@@ -145,12 +175,15 @@ class Display:
                 return
         
         try:
-            results = self.collection.get()
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                print(f"✅ Deleted {len(results['ids'])} chunks from ChromaDB.")
+            total = self.collection.count()
+            Manifest.clear()
+            LexicalIndex.clear()
+            
+            if total:
+                self.collection = reset_collection()
+                print(f"✅ Deleted {total} chunks from ChromaDB.")
             else:
                 print("📦 ChromaDB is already empty.")
                 
         except Exception as e:
-            print(f"❌ Error clearing ChromaDB: {e}")
\ No newline at end of file
+            print(f"❌ Error clearing ChromaDB: {e}")
@@ -1,212 +1,575 @@
-from os import path
-from typing import Callable, List
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import json
 import os
-import ollama as ollama_client
-from chromadb import PersistentClient
 from database.db_manager import DbManager
+from database.lexical_index import LexicalIndex
+from database.manifest import Manifest, hash_file
+from database.setup_chroma_db import get_client, get_collection, reload_collection
+from embedding.cache import EmbeddingCache
+from embedding.client import EmbeddingClient
+from embedding.query_cache import DEFAULT_TTL, QueryCache, search_params
+from embedding.results import print_files, print_results
+from extract.chunker import DEFAULT_SPEC, ChunkSpec
+from extract.extractor import is_supported, iter_chunks
+from profiling import metrics
+from profiling.progress import Progress
 
 
 class Embedder:
 
-    def __init__(self):
-        self.handlers: dict[str, Callable[[str], None]] = {
-            ".pdf": self._embed_pdf,
-            ".txt": self._embed_txt
-        }
-        
-        # initialize ChromaDB client
-        home = os.path.expanduser("~")
-        
-        # Use fixed chroma store path (no environment lookup)
-        chroma_path = os.path.join(home, "chroma_store")
-        if not chroma_path.startswith("/"):
-            chroma_path = os.path.join(home, chroma_path.lstrip("./"))
-        
-        self.client = PersistentClient(path=chroma_path)
-        self.collection = self.client.get_or_create_collection("user_files")
+    def __init__(self, batch_size: int = 64, cache_size: int = 100_000, concurrency: int = 4,
+                 chunk_size: int = 500, overlap: int = 50, query_cache_size: int = 10_000,
+                 query_ttl: float = DEFAULT_TTL, chunker: Optional[Dict[str, ChunkSpec]] = None,
+                 progress: Optional[Progress] = None):
+        # ChromaDB client and collection shared with DbManager and Display
+        self.client = get_client()
+        self.collection = get_collection()
         self.model = "qllama/bge-m3"
 
-    def _embed_pdf(self, file_path: str):
-        from extract.pdf.extract_preprocess_pdf import extract_and_preprocess
-        txt = extract_and_preprocess(file_path)
-        self._chunk_and_embed(txt, file_path)
-    
-    def _embed_txt(self, file_path: str):
-        """Read text file and chunk + embed it."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            self._chunk_and_embed(text, file_path)
-            
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-    
-    def _chunk_and_embed(self, text: str, source_file: str, chunk_size: int = 500, overlap: int = 50):
+        # concurrent ollama client; also bounds how many batches are in flight
+        self.embedding_client = EmbeddingClient(self.model, concurrency=concurrency, request_size=batch_size)
+
+        # vectors of previously embedded chunk texts, shared by all runs (0 disables it)
+        self.cache = EmbeddingCache(self.model, max_entries=cache_size) if cache_size > 0 else None
+
+        # query vectors and search results of repeated queries (0 disables it)
+        self.query_cache = QueryCache(self.model, max_entries=query_cache_size, ttl=query_ttl) \
+            if query_cache_size > 0 else None
+
+        # chunk spec per file extension ("" for the rest); by default, chunks of
+        # chunk_size characters sharing overlap characters
+        self.chunker = chunker or {"": ChunkSpec("char", chunk_size, overlap)}
+
+        # chunks waiting to be embedded and written in a single batch
+        self.batch_size = batch_size
+        self._batch = {'ids': [], 'documents': [], 'metadatas': []}
+
+        # batches whose embeddings were requested but which are not stored yet
+        self._inflight = deque()
+
+        # fingerprints of files whose chunks are all queued; they are recorded in the
+        # manifest once their last batch is written, unless one of their batches failed
+        self._completed: dict[str, dict] = {}
+        self._failed: set[str] = set()
+
+        # exact in-memory snapshot of the collection, opened by the first memory-engine query
+        self._memory_index = None
+
+        # counters of the embedding run and the errors reported in its summary
+        self.progress = progress or Progress()
+
+    def _chunk_and_embed(self, chunks: Iterable[str], source_file: str, fingerprint: Optional[dict] = None):
         """
-        Chunk text with overlap and embed each chunk using ollama.
+        Queue each chunk of a file for batched embedding, as the chunks are produced.
         
         Args:
-            text: The text to chunk and embed
+            chunks: The chunks of the file, typically streamed while its text is extracted
             source_file: The source file path for metadata
-            chunk_size: Number of characters per chunk
-            overlap: Number of characters to overlap between chunks
+            fingerprint: Manifest fingerprint recorded once all chunks are stored
         """
-        chunks = self._create_overlapping_chunks(text, chunk_size, overlap)
-        temp = source_file.split("/")
-        print(f"Created {len(chunks)} chunks from {temp[len(temp)-1]}")
+        count = 0
+        chars = 0
         
-        #get embeddings for each chunk
+        # hidden from searches until its last chunk is written and it is recorded
+        if fingerprint is not None:
+            Manifest.mark_pending(source_file)
+        
+        #queue chunks, embedding and storing them a batch at a time
         for i, chunk in enumerate(chunks):
-            try:
-                # Generate embedding using ollama
-                embedding = self._get_embedding(chunk)
+            self._batch['ids'].append(f"{source_file}_chunk_{i}")
+            self._batch['documents'].append(chunk)
+            # the chunk count is only known at the end of the stream; it is kept in the manifest
+            self._batch['metadatas'].append({
+                "source": source_file,
+                "chunk_index": i
+            })
+            count += 1
+            chars += len(chunk)
+
+            if len(self._batch['ids']) >= self.batch_size:
+                self._dispatch()
+
+        metrics.count("chunks", count)
+        metrics.count("chars", chars)
+
+        # registered only now, so the file is recorded with the batch holding its last chunk
+        if fingerprint is not None:
+            self._completed[source_file] = {**fingerprint, 'chunk_count': count, 'char_count': chars}
+
+    def _dispatch(self):
+        """
+        Request embeddings for the queued chunks without waiting for the model.
+        Once more batches than the client's concurrency are in flight, the oldest
+        one is waited for and written, which keeps memory bounded.
+        """
+        batch, completed = self._batch, self._completed
+        self._batch = {'ids': [], 'documents': [], 'metadatas': []}
+        self._completed = {}
+
+        with metrics.timer("cache.lookup"):
+            cached, missing = self._lookup_cache(batch['documents'])
+        metrics.count("embed.texts", len(missing))
+        future = self.embedding_client.submit(missing) if missing else None
+        self._inflight.append((batch, completed, cached, missing, future))
+
+        while len(self._inflight) > self.embedding_client.concurrency:
+            self._write(self._inflight.popleft())
+
+    def _write(self, inflight: tuple):
+        """
+        Wait for a dispatched batch and store it with one ChromaDB write.
+        Files whose chunks are all written are recorded in the manifest.
+        """
+        batch, completed, cached, missing, future = inflight
+
+        try:
+            if batch['ids']:
+                # Collect the embeddings generated by ollama for the whole batch
+                with metrics.timer("embed.wait"):
+                    vectors = future.result() if future else []
+                embeddings = self._merge_embeddings(batch['documents'], cached, missing, vectors)
                 
                 # Store in ChromaDB with metadata
-                self.collection.add(
-                    ids=[f"{source_file}_chunk_{i}"],
-                    embeddings=[embedding],
-                    documents=[chunk],
-                    metadatas=[{
-                        "source": source_file,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks)
-                    }]
-                )
-                print(f"Embedded chunk {i+1}/{len(chunks)} from {source_file}")
-                
-            except Exception as e:
-                print(f"Error embedding chunk {i} from {source_file}: {e}")
+                with metrics.timer("chroma.add"):
+                    self.collection.add(
+                        ids=batch['ids'],
+                        embeddings=embeddings,
+                        documents=batch['documents'],
+                        metadatas=batch['metadatas']
+                    )
+                with metrics.timer("lexical.add"):
+                    LexicalIndex.add(batch['ids'], batch['documents'], batch['metadatas'])
+                self.progress.chunks_written(len(batch['ids']))
+
+            for file_path, fingerprint in completed.items():
+                if file_path not in self._failed:
+                    with metrics.timer("manifest.record"):
+                        Manifest.record(file_path, model=self.model, **fingerprint)
+                    self.progress.file_done(file_path, fingerprint['chunk_count'])
+            
+        except Exception as e:
+            # files in a failed batch stay out of the manifest and are retried next run
+            sources = {metadata['source'] for metadata in batch['metadatas']}
+            for source in sorted(sources - self._failed):
+                self.progress.error(source, f"embedding failed: {e}")
+            self._failed.update(sources)
+
+    def flush(self):
+        """
+        Embed and store all queued chunks, waiting for every batch in flight.
+        Chunks are queued across files, so callers must flush once they are done embedding.
+        """
+        self._dispatch()
+        while self._inflight:
+            self._write(self._inflight.popleft())
+        # every failed file was reported; a later run (or watch event) embeds it afresh
+        self._failed.clear()
     
-    def _create_overlapping_chunks(self, text: str, chunk_size: int, overlap: int) -> List[str]:
+    def _get_embedding(self, text: str) -> List[float]:
         """
-        Split text into overlapping chunks.
+        Get embedding vector for text using ollama model.
         
         Args:
-            text: The text to chunk
-            chunk_size: Number of characters per chunk
-            overlap: Number of characters to overlap
+            text: The text to embed
             
         Returns:
-            List of text chunks
+            List of floats representing the embedding vector
+        """
+        return self._get_embeddings([text])[0]
+
+    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
-        chunks = []
-        start = 0
-        text_length = len(text)
+        Get embedding vectors for several texts from ollama.
+        Texts found in the embedding cache (or repeated within the batch) are not sent to the model.
         
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            if chunk.strip(): 
-                chunks.append(chunk)
+        Args:
+            texts: The texts to embed
             
-            start += (chunk_size - overlap)
+        Returns:
+            List of embedding vectors, in the same order as texts
+        """
+        cached, missing = self._lookup_cache(texts)
+        vectors = self.embedding_client.embed(missing) if missing else []
+        return self._merge_embeddings(texts, cached, missing, vectors)
+
+    def _lookup_cache(self, texts: List[str]) -> Tuple[list, List[str]]:
+        """
+        Split texts into cached vectors and the unique texts the model still has to embed.
         
-        return chunks
+        Returns:
+            (cached vector or None for each text, unique texts missing from the cache)
+        """
+        cached = self.cache.get_many(texts) if self.cache else [None] * len(texts)
+        missing = list(dict.fromkeys(t for t, vector in zip(texts, cached) if vector is None))
+        return cached, missing
+
+    def _merge_embeddings(self, texts: List[str], cached: list, missing: List[str],
+                          vectors: List[List[float]]) -> List[List[float]]:
+        """Store freshly embedded texts in the cache and combine them with the cached vectors."""
+        fresh = dict(zip(missing, vectors))
+        if self.cache and missing:
+            self.cache.put_many(missing, vectors)
+        return [vector if vector is not None else fresh[t] for t, vector in zip(texts, cached)]
     
-    def _get_embedding(self, text: str) -> List[float]:
+    
+
+    def chunk_spec(self, file_path: str) -> ChunkSpec:
+        """Get the chunk spec configured for a file's extension."""
+        ext = os.path.splitext(file_path)[1].lower()
+        return self.chunker.get(ext, self.chunker.get("", DEFAULT_SPEC))
+
+    def _fingerprint(self, file_path: str) -> Optional[dict]:
         """
-        Get embedding vector for text using ollama model.
+        Compare a file against its manifest entry.
         
         Args:
-            text: The text to embed
+            file_path: Path to the file to check
             
         Returns:
-            List of floats representing the embedding vector
+            None if the file is unchanged since it was embedded with the same model and
+            chunking, otherwise its new fingerprint (size, mtime_ns, content_hash, chunker)
+            and whether stale chunks exist
         """
-        response = ollama_client.embeddings(
-            model=self.model,
-            prompt=text
-        )
-        return response['embedding']
-    
-    
+        stat = os.stat(file_path)
+        entry = Manifest.get(file_path)
+        chunker = str(self.chunk_spec(file_path))
+        # entries recorded before the chunker was tracked used the default one
+        same_setup = entry is not None and entry['model'] == self.model \
+            and (entry['chunker'] or str(DEFAULT_SPEC)) == chunker
+        
+        # unchanged size and mtime: trust the stored fingerprint without reading the file
+        if same_setup and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return None
+        
+        content_hash = hash_file(file_path)
+        if same_setup and entry['content_hash'] == content_hash:
+            Manifest.touch(file_path, stat.st_size, stat.st_mtime_ns)
+            return None
+        
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content_hash': content_hash,
+            'chunker': chunker,
+            # files embedded before the manifest existed only show up in ChromaDB
+            'stale': entry is not None or DbManager.checkKey(file_path)
+        }
+
+    def prepare(self, file_path: str) -> Optional[dict]:
+        """
+        Decide whether a file needs embedding, removing stale chunks of modified files.
+        
+        Args:
+            file_path: Path to the file to check
+            
+        Returns:
+            The fingerprint to pass to embed_chunks, or None if the file is skipped
+        """
+        if not is_supported(file_path):
+            self.progress.file_skipped()
+            return None
+        
+        # Check if file is already embedded in ChromaDB and unchanged
+        try:
+            with metrics.timer("fingerprint"):
+                fingerprint = self._fingerprint(file_path)
+        except OSError as e:
+            # deleted or made unreadable since the scan found it
+            self.progress.error(file_path, f"cannot read: {e}")
+            return None
+        if fingerprint is None:
+            self.progress.file_skipped()
+            return None
+        
+        # modified file: its old chunks are replaced
+        if fingerprint.pop('stale'):
+            DbManager.deleteByFiles([file_path])
+        
+        return fingerprint
+
+    def embed_chunks(self, chunks: Iterable[str], file_path: str, fingerprint: dict):
+        """
+        Embed the chunks of a prepared file.
+        
+        Args:
+            chunks: The chunks of the file, as a list or a stream
+            file_path: Path of the file the chunks come from
+            fingerprint: The fingerprint returned by prepare
+        """
+        try:
+            self._chunk_and_embed(chunks, file_path, fingerprint)
+        except Exception as e:
+            # chunks queued before the error are cleaned up as stale on the next run
+            self.progress.error(file_path, f"cannot read: {str(e) or type(e).__name__}")
+
+    def recover(self, folder: Optional[str] = None):
+        """
+        Delete the chunks of files an interrupted run left half-written (inside a
+        folder, if given), so they are embedded again from the start.
+        """
+        pending = Manifest.pending(folder)
+        if pending:
+            self.progress.message(f"🧹 Removing partial chunks of {len(pending)} file(s) from an interrupted run")
+            DbManager.deleteByFiles(pending)
 
     def embed(self, file_path: str):
         """
-        Embed a file into ChromaDB. Checks if file already exists before embedding.
+        Embed a file into ChromaDB. Files unchanged since they were last embedded are skipped,
+        modified files have their old chunks replaced.
         
         Args:
             file_path: Path to the file to embed
         """
-        # Check if file already exists in ChromaDB
-        if DbManager.checkKey(file_path):
-            print(f"⏭️  Skipping {file_path} - already embedded in database")
+        fingerprint = self.prepare(file_path)
+        if fingerprint is None:
             return
         
-        ext = path.splitext(file_path)[1].lower()
-
-        if ext in self.handlers:
-            print(f"📄 Embedding {file_path}...")
-            self.handlers[ext](file_path)
-        else:
-            print(f"⚠️  Skipping unsupported file type: {file_path}")
+        self.embed_chunks(iter_chunks(file_path, self.chunk_spec(file_path)), file_path, fingerprint)
     
-    def search(self, query_text: str, n_results: int = 5):
+    def close(self):
+        """Stop the embedding client's loop and close the caches and the memory index."""
+        self.embedding_client.close()
+        if self.cache:
+            self.cache.close()
+        if self.query_cache:
+            self.query_cache.close()
+        if self._memory_index is not None:
+            self._memory_index.close()
+            self._memory_index = None
+
+    def reload(self):
         """
-        Search for similar documents using vector similarity.
+        Reopen the ChromaDB client so that a long-lived Embedder sees chunks
+        written or deleted by other processes since it was opened.
+        """
+        self.collection = reload_collection()
+        self.client = get_client()
+
+    def memory_index(self):
+        """Open the in-memory index and bring it up to date with the manifest."""
+        from search.memory_index import MemoryIndex
+        if self._memory_index is None:
+            self._memory_index = MemoryIndex()
+        self._memory_index.refresh()
+        return self._memory_index
+
+    def _query_embedding(self, query_text: str) -> List[float]:
+        """Embed a query, through the query cache when enabled."""
+        return self._query_embeddings([query_text])[0]
+
+    def _query_embeddings(self, query_texts: List[str]) -> List[List[float]]:
+        """Embed several queries with one model call for those missing from the query cache."""
+        if self.query_cache is None:
+            return self.embedding_client.embed(query_texts)
+        
+        vectors = [self.query_cache.get_vector(text) for text in query_texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(query_texts, vectors) if vector is None))
+        if missing:
+            fresh = dict(zip(missing, self.embedding_client.embed(missing)))
+            for text in missing:
+                self.query_cache.put_vector(text, fresh[text])
+            vectors = [vector if vector is not None else fresh[text] for text, vector in zip(query_texts, vectors)]
+        return vectors
+
+    def _cached_results(self, query_text: str, params: dict, compute):
+        """Return the cached results of a search at the current store generation, or compute and cache them."""
+        if self.query_cache is None:
+            return compute()
+        
+        generation = Manifest.generation()
+        results = self.query_cache.get_results(query_text, params, generation)
+        if results is None:
+            results = compute()
+            self.query_cache.put_results(query_text, params, generation, results)
+        return results
+
+    def query(self, query_text: str, n_results: int = 5, engine: str = "hnsw", mode: str = "vector") -> dict:
+        """
+        Find the chunks closest to a query. Results of a repeated query are served
+        from the query cache until files are embedded or deleted.
         
         Args:
             query_text: The text query to search for
-            n_results: Number of top results to return (default: 5)
+            n_results: Number of chunks to return
+            engine: "hnsw" for ChromaDB's approximate index, "memory" for an exact
+                scan of the memory-mapped snapshot of all embeddings, "int8" for a scan
+                of its int8-quantized codes with full-precision re-ranking
+            mode: "vector" for embedding similarity, "lexical" for BM25 over the chunk
+                text, "hybrid" for both fused by reciprocal rank
             
         Returns:
-            dict: Dictionary containing:
-                - sources: List of unique source file paths
-                - results: Full ChromaDB query results with distances, documents, and metadatas
+            dict: ChromaDB query results with ids, distances, documents and metadatas
+            (distances are None for chunks only found lexically)
         """
-        try:
-            # Get embedding for the query text
-            print(f"🔍 Searching for: {query_text}")
-            query_embedding = self._get_embedding(query_text)
-            
-            # Query ChromaDB for similar vectors
+        return self._cached_results(query_text, search_params(n_results, engine, mode),
+                                    lambda: self._query(query_text, n_results, engine, mode))
+
+    @staticmethod
+    def _visible() -> Optional[dict]:
+        """ChromaDB filter hiding the chunks of files still being written, if there are any."""
+        pending = Manifest.pending()
+        return {"source": {"$nin": pending}} if pending else None
+
+    def _query(self, query_text: str, n_results: int, engine: str, mode: str,
+               query_embedding: Optional[List[float]] = None) -> dict:
+        """Run a search, see query(). The query embedding is computed unless given."""
+        if engine not in ("hnsw", "memory", "int8"):
+            raise ValueError(f"unknown search engine '{engine}' (expected hnsw, memory or int8)")
+        if mode not in ("vector", "lexical", "hybrid"):
+            raise ValueError(f"unknown search mode '{mode}' (expected vector, lexical or hybrid)")
+        
+        if mode == "lexical":
+            with metrics.timer("search.lexical"):
+                return LexicalIndex.query(query_text, n_results, exclude=Manifest.pending())
+        
+        if mode == "hybrid":
+            from search.ranking import fuse
+            # each side contributes a deeper list than requested, so fusion has overlap to work with
+            depth = max(n_results * 4, 20)
+            rankings = [self._query(query_text, depth, engine, "vector", query_embedding),
+                        self._query(query_text, depth, engine, "lexical")]
+            return fuse(rankings, n_results)
+        
+        # Get embedding for the query text
+        if query_embedding is None:
+            with metrics.timer("search.embed_query"):
+                query_embedding = self._query_embedding(query_text)
+        
+        if engine in ("memory", "int8"):
+            with metrics.timer(f"search.{engine}"):
+                return self.memory_index().query(query_embedding, n_results, quantized=engine == "int8")
+        
+        # Query ChromaDB for similar vectors
+        with metrics.timer("search.hnsw"):
             results = self.collection.query(
                 query_embeddings=[query_embedding],
-                n_results=n_results
+                n_results=n_results,
+                where=self._visible()
             )
+        return {key: results[key] for key in ('ids', 'distances', 'documents', 'metadatas')}
+
+    def query_files(self, query_text: str, n_files: int = 5, agg: str = "max", engine: str = "hnsw",
+                    chunks_per_file: int = 3, fetch: Optional[int] = None, mode: str = "vector") -> List[dict]:
+        """
+        Find the files closest to a query, from one over-fetched chunk query.
+        
+        Args:
+            query_text: The text query to search for
+            n_files: Number of files to return
+            agg: How chunk scores are combined per file: "max", "mean" or "rrf"
+            engine: "hnsw", "memory" or "int8", see query()
+            chunks_per_file: Number of best chunks kept for each file
+            fetch: Number of chunks retrieved (default: 10 per requested file, at least 50)
+            mode: "vector", "lexical" or "hybrid", see query()
             
-            if not results['ids'] or not results['ids'][0]:
-                print("❌ No results found")
-                return {'sources': [], 'results': results}
-            
-            # Extract unique source file paths
-            sources = set()
-            for metadata_list in results['metadatas']:
-                for metadata in metadata_list:
-                    if metadata and 'source' in metadata:
-                        sources.add(metadata['source'])
-            
-            sources_list = list(sources)
+        Returns:
+            List of {'source', 'score', 'chunks'} dicts, best file first
+        """
+        from search.ranking import AGGREGATIONS, rank_files
+        
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"unknown aggregation '{agg}' (expected {', '.join(AGGREGATIONS)})")
+        
+        params = search_params(engine=engine, mode=mode, files=n_files, agg=agg,
+                               chunks_per_file=chunks_per_file, fetch=fetch)
+        return self._cached_results(query_text, params, lambda: rank_files(
+            self._query(query_text, params['fetch'], engine, mode),
+            n_files=n_files, agg=agg, chunks_per_file=chunks_per_file, by_rank=mode != "vector"
+        ))
+
+    def query_batch(self, query_texts: List[str], n_results: int = 5, engine: str = "hnsw",
+                    mode: str = "vector", batch_size: int = 64) -> Iterator[dict]:
+        """
+        Run many queries, a batch at a time: the queries of a batch are embedded with
+        one model call and, for vector search on ChromaDB's index, answered with one
+        multi-query collection.query. The result cache is bypassed.
+        
+        Args:
+            query_texts: The text queries
+            n_results: Number of chunks to return per query
+            engine: "hnsw", "memory" or "int8", see query()
+            mode: "vector", "lexical" or "hybrid", see query()
+            batch_size: Number of queries embedded and searched together
             
-            # Display results
-            print(f"\n✅ Found {len(results['ids'][0])} matching chunks from {len(sources_list)} file(s)")
-            print("=" * 80)
+        Yields:
+            dict: Results of each query, in order, shaped like query()'s
+        """
+        for start in range(0, len(query_texts), batch_size):
+            part = query_texts[start:start + batch_size]
+            embeddings = self._query_embeddings(part) if mode != "lexical" else [None] * len(part)
             
-            for i, doc_id in enumerate(results['ids'][0]):
-                distance = results['distances'][0][i] if results.get('distances') else None
-                document = results['documents'][0][i] if results.get('documents') else None
-                metadata = results['metadatas'][0][i] if results.get('metadatas') else {}
-                
-                source = metadata.get('source', 'Unknown')
-                chunk_idx = metadata.get('chunk_index', 'N/A')
-                
-                print(f"\n🎯 Result #{i+1}")
-                print(f"   Source: {source}")
-                print(f"   Chunk: {chunk_idx}")
-                if distance is not None:
-                    print(f"   Distance: {distance:.4f}")
-                if document:
-                    preview = document[:200].replace('\n', ' ')
-                    print(f"   Preview: {preview}...")
+            if mode == "vector" and engine == "hnsw":
+                results = self.collection.query(query_embeddings=embeddings, n_results=n_results,
+                                                where=self._visible())
+                for i in range(len(part)):
+                    yield {key: [results[key][i]] for key in ('ids', 'distances', 'documents', 'metadatas')}
+            else:
+                for query_text, query_embedding in zip(part, embeddings):
+                    yield self._query(query_text, n_results, engine, mode, query_embedding)
+
+    def search_batch(self, query_texts: List[str], output: TextIO, n_results: int = 5, engine: str = "hnsw",
+                     mode: str = "vector", files: Optional[int] = None, agg: str = "max",
+                     batch_size: int = 64) -> int:
+        """
+        Run many queries and write their results as JSON Lines, one line per query:
+        {"query", "ids", "distances", "documents", "metadatas"}, or {"query", "files"}
+        when ranking files.
+        
+        Args:
+            query_texts: The text queries
+            output: Text stream the lines are written to
+            n_results: Number of chunks per query
+            engine: "hnsw", "memory" or "int8", see query()
+            mode: "vector", "lexical" or "hybrid", see query()
+            files: If set, rank files instead of chunks and write this many, see query_files()
+            agg: How chunk scores are combined per file when ranking files
+            batch_size: Number of queries embedded and searched together
             
-            print("\n" + "=" * 80)
-            print(f"📁 Relevant files: {', '.join(sources_list)}")
+        Returns:
+            int: Number of queries answered
+        """
+        from search.ranking import rank_files
+        
+        if files:
+            n_results = search_params(files=files, agg=agg)['fetch']
+        
+        count = 0
+        for query_text, results in zip(query_texts, self.query_batch(query_texts, n_results, engine, mode, batch_size)):
+            if files:
+                line = {'query': query_text,
+                        'files': rank_files(results, n_files=files, agg=agg, by_rank=mode != "vector")}
+            else:
+                line = {'query': query_text, **{key: results[key][0] for key in results}}
+            output.write(json.dumps(line) + "\n")
+            count += 1
+        output.flush()
+        return count
+
+    def search(self, query_text: str, n_results: int = 5, engine: str = "hnsw",
+               files: Optional[int] = None, agg: str = "max", mode: str = "vector"):
+        """
+        Search for similar documents using vector similarity.
+        
+        Args:
+            query_text: The text query to search for
+            n_results: Number of top results to return (default: 5)
+            engine: "hnsw", "memory" or "int8", see query()
+            files: If set, rank files instead of chunks and show this many, see query_files()
+            agg: How chunk scores are combined per file when ranking files
+            mode: "vector", "lexical" or "hybrid", see query()
             
-            return {
-                'sources': sources_list,
-                'results': results
-            }
+        Returns:
+            dict: Dictionary containing:
+                - sources: List of unique source file paths
+                - results: Full ChromaDB query results with distances, documents, and metadatas
+                  (the ranked files when ranking files)
+        """
+        try:
+            print(f"🔍 Searching for: {query_text}")
+            if files:
+                return print_files(self.query_files(query_text, files, agg=agg, engine=engine, mode=mode))
+            return print_results(self.query(query_text, n_results, engine=engine, mode=mode))
             
         except Exception as e:
             print(f"❌ Error during search: {e}")
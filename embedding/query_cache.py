@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+from array import array
+from typing import List, Optional
+
+from database import setup_chroma_db
+
+# default lifetime of cached query vectors and results, in seconds
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def search_params(n_results: int = 5, engine: str = "hnsw", mode: str = "vector", files: Optional[int] = None,
+                  agg: str = "max", chunks_per_file: int = 3, fetch: Optional[int] = None) -> dict:
+    """
+    The search options a cached result depends on, besides the query text. File
+    rankings over-fetch 10 chunks per requested file, at least 50, unless told otherwise.
+    """
+    if files:
+        # by_rank: lexical and hybrid rankings score files by rank (search.ranking.rank_files)
+        return {'files': files, 'agg': agg, 'engine': engine, 'mode': mode, 'by_rank': mode != "vector",
+                'chunks_per_file': chunks_per_file, 'fetch': fetch or max(files * 10, 50)}
+    return {'n_results': n_results, 'engine': engine, 'mode': mode}
+
+
+class QueryCache:
+    """
+    Persistent cache of query embeddings and search results, in one SQLite file
+    next to the Chroma store.
+
+    Query texts are normalized (Unicode NFKC, collapsed whitespace) so trivially
+    different spellings of a query share an entry. Query vectors are keyed by model
+    and text; results also by the search options and are only valid for the store
+    generation they were computed at, so any embed or delete invalidates them. Entries
+    expire after `ttl` seconds and the least recently used ones are evicted beyond
+    `max_entries` per table. It only needs the standard library, so `carpet search`
+    can answer a repeated query before loading ChromaDB or the model client.
+    """
+
+    def __init__(self, model: Optional[str] = None, max_entries: int = 10_000, ttl: float = DEFAULT_TTL,
+                 cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = setup_chroma_db.CHROMA_PATH
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.model = model
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "query_cache.sqlite3"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS vectors (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used);
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize a query so equivalent spellings share cache entries."""
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Return the cache key of a normalized query and the values it depends on."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _get(self, table: str, key: str):
+        """Fetch a live entry, refreshing its last use."""
+        now = time.time()
+        row = self._conn.execute(f"SELECT * FROM {table} WHERE key = ? AND created > ?",
+                                 (key, now - self.ttl)).fetchone()
+        if row is not None:
+            self._conn.execute(f"UPDATE {table} SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row
+
+    def _evict(self, table: str):
+        """Drop expired entries and the least recently used ones beyond max_entries."""
+        self._conn.execute(f"DELETE FROM {table} WHERE created <= ?", (time.time() - self.ttl,))
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE key IN "
+            f"(SELECT key FROM {table} ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        )
+
+    def get_vector(self, query_text: str) -> Optional[List[float]]:
+        """Get the cached embedding of a query, or None."""
+        row = self._get("vectors", self.key(self.model, self.normalize(query_text)))
+        return array('f', row[1]).tolist() if row else None
+
+    def put_vector(self, query_text: str, vector: List[float]):
+        """Store the embedding of a query."""
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO vectors (key, vector, created, last_used) VALUES (?, ?, ?, ?)",
+            (self.key(self.model, self.normalize(query_text)), array('f', vector).tobytes(), now, now)
+        )
+        self._evict("vectors")
+        self._conn.commit()
+
+    def get_results(self, query_text: str, params: dict, generation: int):
+        """
+        Get the cached results of a search, if they were computed at this store generation.
+
+        Args:
+            query_text: The text query
+            params: The search options, see search_params()
+            generation: Current store generation (Manifest.generation())
+
+        Returns:
+            The cached results, or None
+        """
+        row = self._get("results", self.key(self.normalize(query_text), params))
+        if row is None or row[1] != generation:
+            return None
+        return json.loads(row[2])
+
+    def put_results(self, query_text: str, params: dict, generation: int, results):
+        """Store the results of a search, dropping results of older generations."""
+        now = time.time()
+        self._conn.execute("DELETE FROM results WHERE generation != ?", (generation,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, generation, results, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (self.key(self.normalize(query_text), params), generation, json.dumps(results), now, now)
+        )
+        self._evict("results")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
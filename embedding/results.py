@@ -0,0 +1,99 @@
+"""
+Formatting of search results. Kept free of chromadb/ollama imports so that
+`carpet search` can print results forwarded by the search server without
+loading the vector store.
+"""
+
+
+def print_results(results: dict) -> dict:
+    """
+    Print ChromaDB query results for a single query.
+    
+    Args:
+        results: ChromaDB query results with ids, distances, documents and metadatas
+        
+    Returns:
+        dict: Dictionary containing:
+            - sources: List of unique source file paths
+            - results: The query results
+    """
+    if not results['ids'] or not results['ids'][0]:
+        print("❌ No results found")
+        return {'sources': [], 'results': results}
+    
+    # Extract unique source file paths, in the order of their best chunk
+    sources = {}
+    for metadata_list in results['metadatas']:
+        for metadata in metadata_list:
+            if metadata and 'source' in metadata:
+                sources.setdefault(metadata['source'], None)
+    
+    sources_list = list(sources)
+    
+    # Display results
+    print(f"\n✅ Found {len(results['ids'][0])} matching chunks from {len(sources_list)} file(s)")
+    print("=" * 80)
+    
+    for i, doc_id in enumerate(results['ids'][0]):
+        distance = results['distances'][0][i] if results.get('distances') else None
+        document = results['documents'][0][i] if results.get('documents') else None
+        metadata = results['metadatas'][0][i] if results.get('metadatas') else {}
+        
+        source = metadata.get('source', 'Unknown')
+        chunk_idx = metadata.get('chunk_index', 'N/A')
+        
+        print(f"\n🎯 Result #{i+1}")
+        print(f"   Source: {source}")
+        print(f"   Chunk: {chunk_idx}")
+        if distance is not None:
+            print(f"   Distance: {distance:.4f}")
+        if document:
+            preview = document[:200].replace('\n', ' ')
+            print(f"   Preview: {preview}...")
+    
+    print("\n" + "=" * 80)
+    print(f"📁 Relevant files: {', '.join(sources_list)}")
+    
+    return {
+        'sources': sources_list,
+        'results': results
+    }
+
+
+def print_files(files: list) -> dict:
+    """
+    Print ranked files with their best chunks.
+    
+    Args:
+        files: Ranked files as returned by Embedder.query_files
+        
+    Returns:
+        dict: Dictionary containing:
+            - sources: Source file paths, best first
+            - results: The ranked files
+    """
+    if not files:
+        print("❌ No results found")
+        return {'sources': [], 'results': files}
+    
+    print(f"\n✅ Found {len(files)} matching file(s)")
+    print("=" * 80)
+    
+    for i, file in enumerate(files):
+        print(f"\n📄 File #{i+1}: {file['source']}")
+        print(f"   Score: {file['score']:.4f}")
+        for chunk in file['chunks']:
+            if chunk['distance'] is not None:
+                print(f"   🎯 Chunk {chunk['chunk_index']} (distance {chunk['distance']:.4f})")
+            else:
+                print(f"   🎯 Chunk {chunk['chunk_index']}")
+            if chunk['document']:
+                preview = chunk['document'][:200].replace('\n', ' ')
+                print(f"      {preview}...")
+    
+    print("\n" + "=" * 80)
+    
+    return {
+        'sources': [file['source'] for file in files],
+        'results': files
+    }
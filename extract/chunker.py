@@ -0,0 +1,267 @@
+import functools
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# bge-m3 accepts up to 8192 tokens per input
+MAX_TOKENS = 8192
+
+
+class ChunkSpec(NamedTuple):
+    """
+    How to chunk a file: a strategy from CHUNKERS, the chunk size and overlap in the
+    strategy's unit (characters, or tokens for "token"), and for "token" an optional
+    tokenizer (a Hugging Face tokenizer name or tokenizer.json path).
+    """
+    strategy: str = "char"
+    size: int = 500
+    overlap: int = 50
+    tokenizer: Optional[str] = None
+
+    def __str__(self) -> str:
+        spec = f"{self.strategy}:{self.size}:{self.overlap}"
+        return f"{spec}:{self.tokenizer}" if self.tokenizer else spec
+
+
+# chunking of files embedded before chunkers were configurable
+DEFAULT_SPEC = ChunkSpec()
+
+# size and overlap of each strategy when only its name is given
+STRATEGY_DEFAULTS = {
+    "char": (500, 50),
+    "sentence": (2000, 200),
+    "token": (1024, 64),
+}
+
+
+def iter_overlapping_chunks(pieces: Iterable[str], chunk_size: int = 500, overlap: int = 50) -> Iterator[str]:
+    """
+    Split streamed text into overlapping chunks.
+    Text arrives in pieces of any size (pages, file blocks); only the text not yet
+    emitted plus one piece is buffered, and overlap carries across piece boundaries.
+    
+    Args:
+        pieces: The text to chunk, as consecutive pieces
+        chunk_size: Number of characters per chunk
+        overlap: Number of characters to overlap
+        
+    Yields:
+        Text chunks that are not only whitespace
+    """
+    if isinstance(pieces, str):
+        pieces = [pieces]
+    step = chunk_size - overlap
+    buffer = ""
+    start = 0
+    
+    for piece in pieces:
+        # keep only the text from the next chunk start on, then append the new piece
+        buffer = buffer[start:] + piece
+        start = 0
+        while len(buffer) - start >= chunk_size:
+            chunk = buffer[start:start + chunk_size]
+            if chunk.strip():
+                yield chunk
+            start += step
+    
+    # the tail is chunked like the rest, until no start position is left
+    while start < len(buffer):
+        chunk = buffer[start:start + chunk_size]
+        if chunk.strip():
+            yield chunk
+        start += step
+
+
+# a sentence ends with . ! or ? followed by whitespace; a paragraph with a blank line
+_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+# text without any boundary is cut at whitespace once this long, to bound the buffer
+_MAX_SENTENCE = 1 << 16
+
+# word pieces and punctuation, for estimating token counts without a tokenizer
+_TOKEN_ESTIMATE = re.compile(r'\w+|[^\w\s]')
+
+
+def iter_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Split streamed text into sentences and paragraphs, each keeping its trailing
+    whitespace so that joining them gives back the text. Only the unfinished
+    sentence is buffered between pieces.
+    """
+    if isinstance(pieces, str):
+        pieces = [pieces]
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        start = 0
+        for match in _BOUNDARY.finditer(buffer):
+            # a boundary at the very end may continue in the next piece
+            if match.end() == len(buffer):
+                break
+            yield buffer[start:match.end()]
+            start = match.end()
+        buffer = buffer[start:]
+        if len(buffer) > _MAX_SENTENCE:
+            cut = max(buffer.rfind(" "), buffer.rfind("\n")) + 1 or len(buffer)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if buffer:
+        yield buffer
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: words, split every 4 characters, and punctuation marks."""
+    return sum((len(token) + 3) // 4 for token in _TOKEN_ESTIMATE.findall(text))
+
+
+@functools.lru_cache(maxsize=None)
+def token_counter(tokenizer: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Get a function counting tokens. With a tokenizer name or tokenizer.json path,
+    the `tokenizers` package counts exactly (it is optional, and loaded once per
+    process); otherwise, or if it cannot be loaded, tokens are estimated.
+    """
+    if tokenizer:
+        try:
+            from tokenizers import Tokenizer
+            if tokenizer.endswith(".json"):
+                loaded = Tokenizer.from_file(tokenizer)
+            else:
+                loaded = Tokenizer.from_pretrained(tokenizer)
+            return lambda text: len(loaded.encode(text, add_special_tokens=False).ids)
+        except Exception as e:
+            print(f"⚠️  Could not load tokenizer {tokenizer} ({e}), estimating token counts")
+    return estimate_tokens
+
+
+def _split_oversized(unit: str, size: int, measure: Callable[[str], int]) -> List[str]:
+    """Split a sentence longer than a chunk at word boundaries, or mid-word as a last resort."""
+    parts, current, current_size = [], "", 0
+    for word in re.findall(r'\S+\s*|\s+', unit):
+        word_size = measure(word)
+        if word_size > size:
+            if current:
+                parts.append(current)
+                current, current_size = "", 0
+            # a single word beyond the budget: cut it into pieces of proportional length
+            step = max(len(word) * size // word_size, 1)
+            parts.extend(word[i:i + step] for i in range(0, len(word), step))
+            continue
+        if current and current_size + word_size > size:
+            parts.append(current)
+            current, current_size = "", 0
+        current += word
+        current_size += word_size
+    if current:
+        parts.append(current)
+    return parts
+
+
+def iter_packed_chunks(units: Iterable[str], size: int, overlap: int,
+                       measure: Callable[[str], int] = len) -> Iterator[str]:
+    """
+    Pack consecutive text units (sentences, paragraphs) into chunks of at most `size`,
+    measured with `measure`, never cutting a unit unless it is larger than a chunk.
+    Each chunk starts with the last units of the previous one, up to `overlap`.
+    
+    Args:
+        units: Consecutive pieces of text that should stay whole
+        size: Maximum chunk size
+        overlap: Maximum size of the units repeated from the previous chunk
+        measure: Size of a piece of text (characters by default)
+        
+    Yields:
+        Text chunks that are not only whitespace
+    """
+    # every flush is followed by appending the part that did not fit, so the window
+    # always ends with a unit no chunk has emitted yet: no chunk is only overlap
+    window: List[tuple] = []
+    window_size = 0
+
+    for unit in units:
+        for part in ([unit] if measure(unit) <= size else _split_oversized(unit, size, measure)):
+            part_size = measure(part)
+            if window and window_size + part_size > size:
+                chunk = "".join(text for text, _ in window)
+                if chunk.strip():
+                    yield chunk
+                # keep the tail of the chunk as overlap, as long as the new part still fits
+                kept, kept_size = [], 0
+                for text, text_size in reversed(window):
+                    if kept_size + text_size > overlap or kept_size + text_size + part_size > size:
+                        break
+                    kept.insert(0, (text, text_size))
+                    kept_size += text_size
+                window, window_size = kept, kept_size
+            window.append((part, part_size))
+            window_size += part_size
+
+    chunk = "".join(text for text, _ in window)
+    if chunk.strip():
+        yield chunk
+
+
+def _chunk_char(pieces: Iterable[str], spec: ChunkSpec) -> Iterator[str]:
+    return iter_overlapping_chunks(pieces, spec.size, spec.overlap)
+
+
+def _chunk_sentence(pieces: Iterable[str], spec: ChunkSpec) -> Iterator[str]:
+    return iter_packed_chunks(iter_sentences(pieces), spec.size, spec.overlap)
+
+
+def _chunk_token(pieces: Iterable[str], spec: ChunkSpec) -> Iterator[str]:
+    return iter_packed_chunks(iter_sentences(pieces), spec.size, spec.overlap, token_counter(spec.tokenizer))
+
+
+# strategy name -> function streaming the chunks of streamed text
+CHUNKERS: Dict[str, Callable[[Iterable[str], ChunkSpec], Iterator[str]]] = {
+    "char": _chunk_char,
+    "sentence": _chunk_sentence,
+    "token": _chunk_token,
+}
+
+
+def iter_spec_chunks(pieces: Iterable[str], spec: ChunkSpec = DEFAULT_SPEC) -> Iterator[str]:
+    """Chunk streamed text with the strategy of a chunk spec."""
+    return CHUNKERS[spec.strategy](pieces, spec)
+
+
+def parse_chunk_spec(text: str) -> ChunkSpec:
+    """
+    Parse `strategy[:size[:overlap[:tokenizer]]]`, e.g. `sentence`, `char:800:80` or
+    `token:1024:64:BAAI/bge-m3`.
+    """
+    strategy, *rest = text.split(":", 3)
+    if strategy not in CHUNKERS:
+        raise ValueError(f"unknown chunker '{strategy}' (expected {', '.join(CHUNKERS)})")
+    size, overlap = STRATEGY_DEFAULTS[strategy]
+    if len(rest) > 0 and rest[0]:
+        size = int(rest[0])
+        # a custom size without overlap keeps the default ratio
+        overlap = size // 10
+    if len(rest) > 1 and rest[1]:
+        overlap = int(rest[1])
+    tokenizer = rest[2] if len(rest) > 2 and rest[2] else None
+
+    if size <= 0 or not 0 <= overlap < size:
+        raise ValueError(f"invalid chunk size {size} and overlap {overlap}")
+    if strategy == "token" and size > MAX_TOKENS:
+        raise ValueError(f"token chunks must fit the model's {MAX_TOKENS} token budget")
+    return ChunkSpec(strategy, size, overlap, tokenizer)
+
+
+def parse_chunker_config(text: str) -> Dict[str, ChunkSpec]:
+    """
+    Parse a chunker configuration: comma-separated chunk specs, each optionally
+    scoped to a file extension, e.g. `sentence` or `token:1024,.txt=sentence:1500:150`.
+    
+    Returns:
+        Map of file extension (or "" for every other file) to its chunk spec
+    """
+    config = {"": DEFAULT_SPEC}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        ext, _, spec = item.rpartition("=")
+        ext = ext.strip().lower()
+        if ext and not ext.startswith("."):
+            ext = "." + ext
+        config[ext] = parse_chunk_spec(spec.strip())
+    return config
@@ -0,0 +1,11 @@
+from typing import Iterator
+
+
+def iter_text_from_code(code_path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Read a source code file in blocks of block_size characters. Bytes that are not
+    valid UTF-8 (legacy encodings, stray binary) are replaced rather than failing the file.
+    """
+    with open(code_path, 'r', encoding='utf-8', errors='replace') as f:
+        for block in iter(lambda: f.read(block_size), ""):
+            yield block
@@ -0,0 +1,72 @@
+import csv
+import json
+from typing import Any, Iterator
+
+# lines of text grouped into each yielded piece
+_LINES_PER_PIECE = 256
+
+
+def iter_text_from_csv(csv_path: str, delimiter: str = ",") -> Iterator[str]:
+    """
+    Read a CSV (or TSV) file row by row, yielding each row as a `column: value` line
+    so that every chunk carries the meaning of its values.
+    """
+    piece = []
+    with open(csv_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        for row in reader:
+            fields = (f"{name}: {value}" for name, value in zip(header, row) if value.strip())
+            piece.append("; ".join(fields) + "\n")
+            if len(piece) >= _LINES_PER_PIECE:
+                yield "".join(piece)
+                piece = []
+    if piece:
+        yield "".join(piece)
+
+
+def iter_text_from_tsv(tsv_path: str) -> Iterator[str]:
+    return iter_text_from_csv(tsv_path, delimiter="\t")
+
+
+def _flatten(value: Any, path: str = "") -> Iterator[str]:
+    """Yield `path: value` lines for every scalar of a JSON value."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from _flatten(item, f"{path}[{i}]")
+    elif value is not None:
+        yield f"{path}: {value}\n" if path else f"{value}\n"
+
+
+def _grouped(lines: Iterator[str]) -> Iterator[str]:
+    piece = []
+    for line in lines:
+        piece.append(line)
+        if len(piece) >= _LINES_PER_PIECE:
+            yield "".join(piece)
+            piece = []
+    if piece:
+        yield "".join(piece)
+
+
+def iter_text_from_json(json_path: str) -> Iterator[str]:
+    """Yield a JSON document as `path: value` lines, one per scalar."""
+    with open(json_path, 'r', encoding='utf-8', errors='replace') as f:
+        document = json.load(f)
+    return _grouped(_flatten(document))
+
+
+def iter_text_from_jsonl(jsonl_path: str) -> Iterator[str]:
+    """Yield a JSON Lines file as `path: value` lines, record by record."""
+    def lines():
+        with open(jsonl_path, 'r', encoding='utf-8', errors='replace') as f:
+            for number, line in enumerate(f):
+                if line.strip():
+                    yield from _flatten(json.loads(line), f"[{number}]")
+                    yield "\n"
+    return _grouped(lines())
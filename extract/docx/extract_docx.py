@@ -0,0 +1,24 @@
+import zipfile
+from typing import Iterator
+from xml.etree.ElementTree import iterparse
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def iter_text_from_docx(docx_path: str) -> Iterator[str]:
+    """
+    Yield the text of each paragraph of a Word (.docx) document, parsing its XML
+    incrementally so large documents are never loaded as a whole tree.
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        with archive.open("word/document.xml") as document:
+            for event, element in iterparse(document, events=("end",)):
+                if element.tag == f"{_W}p":
+                    text = "".join(
+                        node.text or "" if node.tag == f"{_W}t" else "\t" if node.tag == f"{_W}tab" else ""
+                        for node in element.iter()
+                    )
+                    if text.strip():
+                        yield text + "\n\n"
+                    # paragraphs are done with once read
+                    element.clear()
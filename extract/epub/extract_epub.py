@@ -0,0 +1,30 @@
+import posixpath
+import zipfile
+from typing import Iterator
+from xml.etree import ElementTree
+
+from extract.html.extract_html import iter_html_text
+
+_CONTAINER = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+_OPF = "{http://www.idpf.org/2007/opf}"
+
+
+def iter_text_from_epub(epub_path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Yield the text of an EPUB book, chapter by chapter in reading (spine) order.
+    """
+    with zipfile.ZipFile(epub_path) as archive:
+        container = ElementTree.fromstring(archive.read("META-INF/container.xml"))
+        package_path = container.find(f".//{_CONTAINER}rootfile").get("full-path")
+        package = ElementTree.fromstring(archive.read(package_path))
+        base = posixpath.dirname(package_path)
+
+        manifest = {item.get("id"): item.get("href") for item in package.iter(f"{_OPF}item")}
+        for itemref in package.iter(f"{_OPF}itemref"):
+            href = manifest.get(itemref.get("idref"))
+            if not href:
+                continue
+            with archive.open(posixpath.normpath(posixpath.join(base, href))) as chapter:
+                blocks = iter(lambda: chapter.read(block_size).decode('utf-8', errors='replace'), "")
+                yield from iter_html_text(blocks)
+            yield "\n\n"
@@ -0,0 +1,197 @@
+import os
+import zipfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from extract.chunker import DEFAULT_SPEC, ChunkSpec, iter_spec_chunks
+
+
+# file extension -> function streaming the text to embed in pieces
+EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {}
+
+# sniffed MIME type -> extractor, for files whose extension is unknown or missing
+MIME_EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {}
+
+# extensions of source code and plain-text formats read as text
+CODE_EXTENSIONS = (
+    ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".scala", ".go", ".rs", ".c", ".h",
+    ".cc", ".cpp", ".hpp", ".cs", ".rb", ".php", ".swift", ".m", ".sh", ".bash", ".zsh", ".ps1",
+    ".sql", ".r", ".lua", ".pl", ".hs", ".ex", ".exs", ".erl", ".clj", ".dart", ".vue", ".svelte",
+    ".css", ".scss", ".xml", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".rst", ".tex", ".log",
+)
+
+# bytes read from the start of a file to sniff its type
+_SNIFF_SIZE = 2048
+
+
+def register_extractor(extensions: Iterable[str] = (), mime_types: Iterable[str] = ()):
+    """
+    Register a function streaming the text of a file for the given extensions
+    (lowercase, with the dot) and sniffed MIME types. Later registrations win, so
+    plugins can replace the built-in extractors.
+    """
+    def register(extractor: Callable[[str], Iterator[str]]):
+        for ext in extensions:
+            EXTRACTORS[ext] = extractor
+        for mime_type in mime_types:
+            MIME_EXTRACTORS[mime_type] = extractor
+        return extractor
+    return register
+
+
+# extractor modules are only imported by processes that actually parse such files
+
+@register_extractor([".pdf"], ["application/pdf"])
+def _extract_pdf(file_path: str) -> Iterator[str]:
+    from extract.pdf.extract_preprocess_pdf import iter_extract_and_preprocess
+    return iter_extract_and_preprocess(file_path)
+
+
+@register_extractor([".txt"], ["text/plain"])
+def _extract_txt(file_path: str) -> Iterator[str]:
+    from extract.txt.extract_txt import iter_text_from_txt
+    return iter_text_from_txt(file_path)
+
+
+@register_extractor(CODE_EXTENSIONS)
+def _extract_code(file_path: str) -> Iterator[str]:
+    from extract.code.extract_code import iter_text_from_code
+    return iter_text_from_code(file_path)
+
+
+@register_extractor([".md", ".markdown"], ["text/markdown"])
+def _extract_markdown(file_path: str) -> Iterator[str]:
+    from extract.markdown.extract_markdown import iter_text_from_markdown
+    return iter_text_from_markdown(file_path)
+
+
+@register_extractor([".html", ".htm", ".xhtml"], ["text/html"])
+def _extract_html(file_path: str) -> Iterator[str]:
+    from extract.html.extract_html import iter_text_from_html
+    return iter_text_from_html(file_path)
+
+
+@register_extractor([".docx"], ["application/vnd.openxmlformats-officedocument.wordprocessingml.document"])
+def _extract_docx(file_path: str) -> Iterator[str]:
+    from extract.docx.extract_docx import iter_text_from_docx
+    return iter_text_from_docx(file_path)
+
+
+@register_extractor([".epub"], ["application/epub+zip"])
+def _extract_epub(file_path: str) -> Iterator[str]:
+    from extract.epub.extract_epub import iter_text_from_epub
+    return iter_text_from_epub(file_path)
+
+
+@register_extractor([".csv"], ["text/csv"])
+def _extract_csv(file_path: str) -> Iterator[str]:
+    from extract.data.extract_data import iter_text_from_csv
+    return iter_text_from_csv(file_path)
+
+
+@register_extractor([".tsv"])
+def _extract_tsv(file_path: str) -> Iterator[str]:
+    from extract.data.extract_data import iter_text_from_tsv
+    return iter_text_from_tsv(file_path)
+
+
+@register_extractor([".json"], ["application/json"])
+def _extract_json(file_path: str) -> Iterator[str]:
+    from extract.data.extract_data import iter_text_from_json
+    return iter_text_from_json(file_path)
+
+
+@register_extractor([".jsonl", ".ndjson"])
+def _extract_jsonl(file_path: str) -> Iterator[str]:
+    from extract.data.extract_data import iter_text_from_jsonl
+    return iter_text_from_jsonl(file_path)
+
+
+def sniff_mime_type(file_path: str) -> Optional[str]:
+    """
+    Guess a file's MIME type from its first bytes: magic numbers for PDF and zip-based
+    formats (DOCX, EPUB), markers for HTML and JSON, and text/plain for anything else
+    that decodes as UTF-8 without NUL bytes. Returns None for binary or unreadable files.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(_SNIFF_SIZE)
+    except OSError:
+        return None
+
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = set(archive.namelist())
+                if "mimetype" in names and archive.read("mimetype").strip() == b"application/epub+zip":
+                    return "application/epub+zip"
+                if "word/document.xml" in names:
+                    return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        except (zipfile.BadZipFile, OSError):
+            pass
+        return None
+    if not head or b"\x00" in head:
+        return None
+    try:
+        # a multi-byte character may be cut at the end of the sample
+        text = head.decode('utf-8', errors='strict' if len(head) < _SNIFF_SIZE else 'ignore')
+    except UnicodeDecodeError:
+        return None
+
+    start = text.lstrip()[:256].lower()
+    if start.startswith(("<!doctype html", "<html")):
+        return "text/html"
+    if start.startswith(("{", "[")):
+        return "application/json"
+    return "text/plain"
+
+
+def get_extractor(file_path: str) -> Optional[Callable[[str], Iterator[str]]]:
+    """
+    Find the extractor of a file: by extension, or else by sniffed MIME type
+    (extensionless files such as README, or unknown extensions holding text).
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+    if extractor is None:
+        mime_type = sniff_mime_type(file_path)
+        extractor = MIME_EXTRACTORS.get(mime_type) if mime_type else None
+    return extractor
+
+
+def is_supported(file_path: str) -> bool:
+    """Check if there is an extractor for the file."""
+    return get_extractor(file_path) is not None
+
+
+def iter_text(file_path: str) -> Iterator[str]:
+    """
+    Stream the text of a file, in pieces, with the extractor registered for its
+    extension or sniffed type.
+    """
+    extractor = get_extractor(file_path)
+    if extractor is None:
+        raise ValueError(f"Unsupported file type: {file_path}")
+    return extractor(file_path)
+
+
+def extract_text(file_path: str) -> str:
+    """
+    Extract the whole text of a file.
+    """
+    return "".join(iter_text(file_path))
+
+
+def iter_chunks(file_path: str, spec: ChunkSpec = DEFAULT_SPEC) -> Iterator[str]:
+    """
+    Stream the chunks of a file as its text is extracted, chunked as the spec says.
+    """
+    return iter_spec_chunks(iter_text(file_path), spec)
+
+
+def extract_chunks(file_path: str, spec: ChunkSpec = DEFAULT_SPEC) -> List[str]:
+    """
+    Extract and chunk a file in one go.
+    Module-level so it can be sent to worker processes.
+    """
+    return list(iter_chunks(file_path, spec))
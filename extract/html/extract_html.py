@@ -0,0 +1,62 @@
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List
+
+# elements whose content is not text to embed (<head> is read for its <title>)
+_SKIPPED = {"script", "style", "noscript", "template", "svg"}
+# elements that start a new line of text
+_BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section",
+           "article", "header", "footer", "blockquote", "pre", "table", "ul", "ol", "title"}
+
+
+class _TextParser(HTMLParser):
+    """Collect the visible text of an HTML document as it is fed."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED:
+            self._skip_depth += 1
+        elif tag in _BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in _BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def take(self) -> str:
+        """Return and forget the text collected so far."""
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+
+def iter_html_text(pieces: Iterable[str]) -> Iterator[str]:
+    """Stream the visible text of HTML that arrives in pieces."""
+    parser = _TextParser()
+    for piece in pieces:
+        parser.feed(piece)
+        text = parser.take()
+        if text.strip():
+            yield text
+    parser.close()
+    text = parser.take()
+    if text.strip():
+        yield text
+
+
+def iter_text_from_html(html_path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Read an HTML file in blocks, yielding its title and visible text (scripts and
+    styles are left out).
+    """
+    with open(html_path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from iter_html_text(iter(lambda: f.read(block_size), ""))
@@ -0,0 +1,37 @@
+import re
+from typing import Iterator
+
+# [text](url) and ![alt](url) keep only their text
+_LINK = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+# heading markers, block quotes and list bullets at the start of a line
+_LINE_PREFIX = re.compile(r'^\s{0,3}(?:#{1,6}\s+|>\s?|[-*+]\s+(?=\S))')
+# inline code markers, and emphasis markers only outside words, so snake_case names
+# and 2*3*4 stay whole
+_EMPHASIS = re.compile(r'`(?=\S)(.+?)(?<=\S)`|(?<!\w)(\*\*|__|\*|_)(?=\S)(.+?)(?<=\S)\2(?!\w)')
+
+
+def markdown_line_to_text(line: str) -> str:
+    """Strip the markup of one Markdown line, keeping its text."""
+    line = _LINK.sub(r'\1', line)
+    line = _LINE_PREFIX.sub('', line)
+    return _EMPHASIS.sub(lambda m: m.group(1) if m.group(1) is not None else m.group(3), line)
+
+
+def iter_text_from_markdown(md_path: str, lines_per_piece: int = 512) -> Iterator[str]:
+    """
+    Read a Markdown file line by line, yielding its text without markup in pieces of
+    lines_per_piece lines. Fenced code blocks are kept verbatim, without the fences.
+    """
+    piece = []
+    in_fence = False
+    with open(md_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.lstrip().startswith(("```", "~~~")):
+                in_fence = not in_fence
+                continue
+            piece.append(line if in_fence else markdown_line_to_text(line))
+            if len(piece) >= lines_per_piece:
+                yield "".join(piece)
+                piece = []
+    if piece:
+        yield "".join(piece)
@@ -1,25 +1,34 @@
 import os
 import re
+from typing import Iterator
 from PyPDF2 import PdfReader
 
+from profiling import metrics
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
     """
-    Extract raw text from a PDF file.
-    Returns all text concatenated from all pages.
+    Yield the raw text of each page of a PDF file, one page at a time.
+    Pages without extractable text are skipped.
     """
     pdf_path = os.path.abspath(os.path.expanduser(pdf_path))
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"File not found: {pdf_path}")
 
     reader = PdfReader(pdf_path)
-    text = ""
     for page in reader.pages:
-        page_text = page.extract_text()
+        with metrics.timer("pdf.page"):
+            page_text = page.extract_text()
         if page_text:
-            text += page_text + "\n"
+            yield page_text
 
-    return text
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """
+    Extract raw text from a PDF file.
+    Returns all text concatenated from all pages.
+    """
+    return "".join(page_text + "\n" for page_text in iter_pdf_pages(pdf_path))
 
 
 def preprocess_pdf_text(raw_text: str) -> str:
@@ -45,9 +54,23 @@ def preprocess_pdf_text(raw_text: str) -> str:
     return text.strip()
 
 
+def iter_extract_and_preprocess(pdf_path: str) -> Iterator[str]:
+    """
+    Extract and preprocess a PDF page by page, so only one page is held in memory.
+    Yields the cleaned text of each page, prefixed with the space that separates
+    it from the previous page.
+    """
+    separator = ""
+    for page_text in iter_pdf_pages(pdf_path):
+        with metrics.timer("pdf.preprocess"):
+            text = preprocess_pdf_text(page_text)
+        if text:
+            yield separator + text
+            separator = " "
+
+
 def extract_and_preprocess(pdf_path: str) -> str:
     """
     Convenience function to extract and preprocess PDF text in one step.
     """
-    raw_text = extract_text_from_pdf(pdf_path)
-    return preprocess_pdf_text(raw_text)
+    return "".join(iter_extract_and_preprocess(pdf_path))
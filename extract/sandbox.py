@@ -0,0 +1,73 @@
+"""
+Limits for extraction worker processes, so that a pathological file (a PDF that
+makes the parser loop, a decompression bomb) fails on its own instead of
+stalling or exhausting the memory of the whole ingest.
+
+Each worker caps the growth of its address space when it starts; each file gets a wall-clock
+alarm and a CPU-time limit. The alarm raises TimeoutError inside Python code,
+and the CPU limit kills a worker stuck in native code. The pool then breaks and
+the ingestor replaces it. Limits need the POSIX resource and signal APIs; on
+other platforms files are extracted without them.
+"""
+import signal
+from typing import List
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from extract.chunker import ChunkSpec
+from extract.extractor import extract_chunks
+
+
+def _set_limit(kind: int, value: int):
+    """Lower a soft resource limit, never above the hard limit."""
+    soft, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(kind, (value, hard))
+
+
+def _address_space() -> int:
+    """Current virtual memory size of this process in bytes (0 when unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def init_worker(memory_mb: int = 0):
+    """
+    Pool initializer: let the worker's address space grow by at most `memory_mb`
+    beyond its size at startup (0 leaves it unlimited). Allocations
+    beyond it raise MemoryError in the worker.
+    """
+    if memory_mb > 0 and resource is not None:
+        _set_limit(resource.RLIMIT_AS, _address_space() + (memory_mb << 20))
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("extraction timed out")
+
+
+def extract_chunks_limited(file_path: str, spec: ChunkSpec, timeout: float = 0) -> List[str]:
+    """
+    Extract and chunk a file in a worker process, within `timeout` seconds of wall
+    and CPU time (0 disables both limits).
+    """
+    if timeout <= 0 or resource is None or not hasattr(signal, "setitimer"):
+        return extract_chunks(file_path, spec)
+
+    # the CPU limit is cumulative for the process: allow this file `timeout` more seconds
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _set_limit(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime + timeout) + 1)
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_chunks(file_path, spec)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,18 @@
+from typing import Iterator
+
+
+def iter_text_from_txt(txt_path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Read a plain text file as UTF-8, yielding it in blocks of block_size characters.
+    """
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for block in iter(lambda: f.read(block_size), ""):
+            yield block
+
+
+def extract_text_from_txt(txt_path: str) -> str:
+    """
+    Read a plain text file as UTF-8.
+    """
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        return f.read()
@@ -1,27 +1,200 @@
-import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
+from database.db_manager import DbManager
+from database.manifest import Manifest
 from embedding.embedder import Embedder
+from extract.chunker import ChunkSpec
+from extract.extractor import iter_chunks
+from extract.sandbox import extract_chunks_limited, init_worker
+from ingestion.scanner import DEFAULT_MAX_SIZE, scan
+from profiling import metrics
+from profiling.progress import Progress
 
 
 class Ingestor:
 
-    def __init__(self):
+    def __init__(self, batch_size: int = 64, cache_size: int = 100_000,
+                 workers: int = 1, queue_size: int = 16, concurrency: int = 4,
+                 chunker: Optional[Dict[str, ChunkSpec]] = None, extract_timeout: float = 120,
+                 extract_memory: int = 2048, progress: Optional[Progress] = None):
         self.file_paths = []
-        self.embedder = Embedder()
+        # status line and error summary of each run (see profiling.progress)
+        self.progress = progress or Progress()
+        self.embedder = Embedder(batch_size=batch_size, cache_size=cache_size, concurrency=concurrency,
+                                 chunker=chunker, progress=self.progress)
+        # extraction processes, and how many files may be extracted ahead of the embedder
+        self.workers = workers
+        self.queue_size = max(queue_size, 1)
+        # seconds and megabytes a worker may spend extracting one file (0: unlimited)
+        self.extract_timeout = extract_timeout
+        self.extract_memory = extract_memory
 
-    def extract(self):
+    def extract(self, file_paths: Iterable[str]) -> Iterator[Tuple[str, dict, Iterable[str]]]:
+        """
+        Extract and chunk every file that needs embedding.
+        With one worker, chunks are streamed lazily as each file is read, so memory stays
+        bounded by a few pages. With more workers, extraction runs in a process pool and
+        stays up to queue_size files ahead of the consumer, so parsing overlaps with embedding;
+        each worker runs within the extraction time and memory limits (see extract.sandbox).
+        
+        Args:
+            file_paths: Files to extract, in order
+            
+        Yields:
+            (file_path, fingerprint, chunks) for each file to embed, in input order
+        """
+        if self.workers <= 1:
+            for file_path in file_paths:
+                fingerprint = self.embedder.prepare(file_path)
+                if fingerprint is not None:
+                    chunks = iter_chunks(file_path, self.embedder.chunk_spec(file_path))
+                    yield file_path, fingerprint, metrics.timed_iter("extract", chunks)
+            return
 
-        pass
+        pool = self._new_pool()
+        pending = deque()
+        # files that were queued when a worker was killed, rerun one at a time
+        retry = deque()
+        paths = iter(file_paths)
+        
+        def submit(file_path: str, fingerprint: dict, isolated: bool = False):
+            future = pool.submit(extract_chunks_limited, file_path, self.embedder.chunk_spec(file_path),
+                                 self.extract_timeout)
+            pending.append((file_path, fingerprint, future, isolated))
+        
+        try:
+            while True:
+                if retry:
+                    if not pending:
+                        submit(*retry.popleft(), isolated=True)
+                else:
+                    # keep the queue full before waiting on its oldest file
+                    for file_path in paths:
+                        fingerprint = self.embedder.prepare(file_path)
+                        if fingerprint is None:
+                            continue
+                        submit(file_path, fingerprint)
+                        if len(pending) >= self.queue_size:
+                            break
+                
+                if not pending:
+                    return
+                
+                file_path, fingerprint, future, isolated = pending.popleft()
+                try:
+                    with metrics.timer("extract.wait"):
+                        chunks = future.result()
+                except BrokenProcessPool:
+                    # a worker was killed (CPU or memory limit) and every queued file failed
+                    # with it: start a new pool and rerun them alone, so only the culprit fails
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+                    if isolated:
+                        self.progress.error(file_path, "extraction worker was killed (time or memory limit)")
+                    else:
+                        retry.extend([(file_path, fingerprint)] + [(p, f) for p, f, _, _ in pending])
+                        pending.clear()
+                    continue
+                except Exception as e:
+                    self.progress.error(file_path, f"cannot read: {str(e) or type(e).__name__}")
+                    continue
+                yield file_path, fingerprint, chunks
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    def open_folder(self, folder_path: str):
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """
+        Start extraction workers with the configured memory limit. Workers are not
+        forked from this process, whose embedding client thread is already running
+        (forking a threaded process can deadlock), but from a fork server, or spawned
+        where there is none.
+        """
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                   initargs=(self.extract_memory,),
+                                   mp_context=multiprocessing.get_context(method))
 
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                self.file_paths.append(full_path)
+    def close(self):
+        """Release the embedder's client thread and caches."""
+        self.embedder.close()
 
-        for file_path in self.file_paths:
-            self.embedder.embed(file_path)
-            pass
+    def _track(self, file_paths: Iterable[str]) -> Iterator[str]:
+        """Record the paths of a scan as it streams, for the deleted-file check."""
+        for file_path in file_paths:
+            self.file_paths.append(file_path)
+            self.progress.file_seen()
+            yield file_path
+        self.progress.scan_finished()
 
-        print(self.file_paths)
+    def _skip(self, file_paths: Iterable[str], done: set) -> Iterator[str]:
+        """Leave out the files an interrupted run finished, counting them as unchanged."""
+        for file_path in file_paths:
+            if file_path in done:
+                self.progress.file_skipped()
+            else:
+                yield file_path
+
+    def embed_files(self, file_paths: Iterable[str]):
+        """Embed the files that are new or changed, and write the last partial batch."""
+        for file_path, fingerprint, chunks in self.extract(file_paths):
+            metrics.count("files")
+            metrics.count("bytes", fingerprint['size'])
+            self.embedder.embed_chunks(chunks, file_path, fingerprint)
+
+        # write whatever is left of the last batch
+        self.embedder.flush()
+
+    def open_folder(self, folder_path: str, max_file_size: int = DEFAULT_MAX_SIZE, resume: bool = False):
+        """
+        Embed the new and modified files of a folder and drop those that were deleted.
+        Each file is committed on its own: its chunks are searchable, and it is
+        checkpointed in the run's journal, once all of them are written.
+        
+        Args:
+            folder_path: Absolute folder path
+            max_file_size: Files larger than this many bytes are skipped (0: no limit)
+            resume: Skip the files an interrupted run of this folder already finished,
+                without checking them again
+        """
+        # chunks of files a crashed run did not finish are removed and written again
+        self.embedder.recover(folder_path)
+
+        done = Manifest.start_run(folder_path, resume)
+        if resume:
+            if done is None:
+                self.progress.message("▶️  No interrupted run of this folder to resume, starting afresh")
+            else:
+                self.progress.message(f"⏩ Resuming: {len(done)} file(s) finished by the interrupted run "
+                                      f"are skipped")
+
+        # the files indexed last time are the best guess at the total until the scan ends
+        known = Manifest.paths_under(folder_path)
+        self.progress.start(estimate=len(known))
+        try:
+            # files are embedded as the scan finds them
+            self.file_paths = []
+            files = self._track(metrics.timed_iter("scan", scan(folder_path, max_size=max_file_size,
+                                                                on_error=self.progress.error)))
+            if done:
+                files = self._skip(files, done)
+            self.embed_files(files)
+
+            # drop chunks of files that were embedded before but no longer exist
+            seen = set(self.file_paths)
+            removed = [p for p in known if p not in seen]
+            if removed:
+                DbManager.deleteByFiles(removed)
+                self.progress.files_removed(len(removed))
+
+            # keep the memory search engine's snapshot in step, once it has been used
+            from search.memory_index import MemoryIndex
+            if MemoryIndex.exists():
+                MemoryIndex().refresh()
+
+            Manifest.finish_run(folder_path)
+        finally:
+            self.progress.finish()
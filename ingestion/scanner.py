@@ -0,0 +1,270 @@
+"""
+Directory scanner for `carpet embed`.
+
+Walks a folder with os.scandir, yielding the files worth embedding as soon as
+they are found. Ignored directories are pruned before they are entered, so
+`.git`, `node_modules` or a virtualenv cost one directory entry each, and the
+Chroma store is never scanned. Files are filtered by their extension and by the
+size from their directory entry's stat, without opening them; only files with
+an unknown extension are sniffed.
+
+Ignore rules follow .gitignore syntax and are read from every `.gitignore` and
+`.carpetignore` on the way down, applying to the directory they are in and
+below. Later rules win, so an ignore file can re-include (`!node_modules/`)
+what the built-in rules skip.
+"""
+import os
+import re
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Pattern
+
+from database import setup_chroma_db
+from extract.extractor import EXTRACTORS, is_supported
+
+# files holding ignore rules, read in every directory
+IGNORE_FILES = (".gitignore", ".carpetignore")
+
+# skipped unless an ignore file re-includes them
+DEFAULT_IGNORES = (
+    ".git/", ".hg/", ".svn/", "node_modules/", ".venv/", "venv/", "__pycache__/",
+    ".tox/", ".mypy_cache/", ".pytest_cache/",
+)
+
+# extensions never worth sniffing for text
+BINARY_EXTENSIONS = frozenset((
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".svgz", ".mp3", ".wav", ".flac",
+    ".mp4", ".mov", ".avi", ".mkv", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar",
+    ".jar", ".whl", ".so", ".dylib", ".dll", ".exe", ".o", ".a", ".lib", ".pyc", ".class",
+    ".woff", ".woff2", ".ttf", ".otf", ".sqlite3", ".db", ".parquet", ".npy", ".pkl", ".bin",
+))
+
+# files larger than this are skipped by default (bytes, 0: no limit)
+DEFAULT_MAX_SIZE = 100 << 20
+
+
+class IgnoreRule(NamedTuple):
+    regex: Pattern
+    base: str        # directory of the ignore file, relative to the scan root ('' for the root)
+    negated: bool
+    dir_only: bool
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate a .gitignore glob (without `!` or a trailing `/`) to a regex on relative paths."""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        elif c == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            chars = pattern[i + 1:end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            out.append(f"[{chars}]")
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    # a pattern without a slash matches a name at any depth
+    return ("" if anchored else "(?:.*/)?") + "".join(out)
+
+
+def parse_rule(line: str, base: str = "") -> Optional[IgnoreRule]:
+    """Parse one line of an ignore file, or return None for blanks and comments."""
+    line = line.rstrip("\n")
+    if not line.endswith("\\ "):
+        line = line.rstrip()
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    return IgnoreRule(re.compile(translate_pattern(line) + r"\Z"), base, negated, dir_only)
+
+
+def load_rules(directory: str, base: str, names: Iterable[str] = IGNORE_FILES) -> List[IgnoreRule]:
+    """Read the ignore files of a directory (those of `names` it has)."""
+    rules = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                rules.extend(rule for rule in (parse_rule(line, base) for line in f) if rule)
+        except OSError:
+            continue
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """Apply the rules in order to a path relative to the scan root; the last match wins."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not rel_path.startswith(rule.base + "/"):
+                continue
+            path = rel_path[len(rule.base) + 1:]
+        else:
+            path = rel_path
+        if rule.regex.match(path):
+            ignored = not rule.negated
+    return ignored
+
+
+def wanted_file(path: str, size: int, max_size: int = DEFAULT_MAX_SIZE) -> bool:
+    """Whether a file is worth embedding, by its size and extension (sniffing unknown ones)."""
+    if max_size and size > max_size:
+        return False
+    ext = os.path.splitext(path)[1].lower()
+    return ext in EXTRACTORS or (ext not in BINARY_EXTENSIONS and is_supported(path))
+
+
+def _store_paths() -> set:
+    return {os.path.abspath(setup_chroma_db.CHROMA_PATH), os.path.realpath(setup_chroma_db.CHROMA_PATH)}
+
+
+def _default_rules() -> List[IgnoreRule]:
+    return [rule for rule in map(parse_rule, DEFAULT_IGNORES) if rule]
+
+
+class IgnoreMatcher:
+    """
+    The ignore rules of a tree, for checking single paths (as `carpet watch` gets
+    them from change events). The rules of each directory are read once and cached
+    until invalidate() is called.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.store = _store_paths()
+        self._rules = {}
+
+    def invalidate(self):
+        """Forget the cached rules, after an ignore file changed."""
+        self._rules.clear()
+
+    def relative(self, path: str) -> Optional[str]:
+        """Path relative to the root with `/` separators, or None if it is outside."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == os.curdir:
+            return ""
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return None
+        return rel.replace(os.sep, "/")
+
+    def rules(self, rel_dir: str) -> List[IgnoreRule]:
+        """Rules applying inside a directory: its parents' and its own."""
+        if rel_dir not in self._rules:
+            inherited = self.rules(rel_dir.rpartition("/")[0]) if rel_dir else _default_rules()
+            self._rules[rel_dir] = inherited + load_rules(os.path.join(self.root, rel_dir), rel_dir)
+        return self._rules[rel_dir]
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """Whether scan() would skip a path: outside the root, in the store or under an ignored directory."""
+        path = os.path.abspath(path)
+        rel = self.relative(path)
+        if rel is None or any(path == store or path.startswith(store + os.sep) for store in self.store):
+            return True
+        if not rel:
+            return False
+
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            parent, rel_dir = "/".join(parts[:i - 1]), "/".join(parts[:i])
+            if is_ignored(self.rules(parent), rel_dir, True):
+                return True
+        return is_ignored(self.rules("/".join(parts[:-1])), rel, is_dir)
+
+
+def scan(root: str, max_size: int = DEFAULT_MAX_SIZE, top: Optional[str] = None,
+         dirs: bool = False, on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[str]:
+    """
+    Yield the supported files under a folder, depth first, in name order.
+
+    Args:
+        root: Folder to scan, whose ignore files apply
+        max_size: Files larger than this many bytes are skipped (0: no limit)
+        top: Subfolder of root to scan instead of all of it, with the rules of its parents
+        dirs: Yield the directories walked (top included) instead of the files
+        on_error: Called with the path and the error of each directory that cannot be
+            read (printed by default)
+
+    Yields:
+        Path of each file to embed, as soon as its directory is read
+    """
+    root = os.path.abspath(root)
+    top = os.path.abspath(top) if top else root
+    store = _store_paths()
+
+    rel_top, rules = "", _default_rules()
+    if top != root:
+        matcher = IgnoreMatcher(root)
+        rel_top = matcher.relative(top)
+        rules = matcher.rules(rel_top.rpartition("/")[0])
+
+    # directories still to read, with their path relative to the root and their parent's rules
+    stack = [(top, rel_top, rules)]
+    while stack:
+        directory, rel_dir, rules = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            if on_error is not None:
+                on_error(directory, f"cannot read folder: {e}")
+            else:
+                print(f"⚠️  Cannot read {directory}: {e}")
+            continue
+
+        if dirs:
+            yield directory
+
+        ignore_files = [entry.name for entry in entries if entry.name in IGNORE_FILES]
+        if ignore_files:
+            rules = rules + load_rules(directory, rel_dir, ignore_files)
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in store and not is_ignored(rules, rel_path, True):
+                        subdirs.append((entry.path, rel_path))
+                    continue
+                if dirs or entry.name in IGNORE_FILES or not entry.is_file() or is_ignored(rules, rel_path, False):
+                    continue
+                size = entry.stat().st_size if max_size else 0
+            except OSError:
+                continue
+
+            if wanted_file(entry.path, size, max_size):
+                yield entry.path
+
+        # push in reverse so subdirectories are read in name order
+        for path, rel_path in reversed(subdirs):
+            stack.append((path, rel_path, rules))
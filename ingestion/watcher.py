@@ -0,0 +1,301 @@
+"""
+`carpet watch`: keep the index of a folder up to date as its files change.
+
+Change events come from inotify on Linux (through ctypes, one watch per
+directory that is not ignored) and from periodic scans elsewhere, or when the
+inotify watch limit is reached. Events are debounced: a burst of changes (a
+checkout, a build, an editor's save dance) is collected until the tree has
+been quiet for `debounce` seconds, then only the paths it touched are
+re-embedded or deleted, with all their chunks written in shared batches. An
+idle watcher blocks in poll() and uses no CPU.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from database.db_manager import DbManager
+from database.manifest import Manifest
+from ingestion.ingestor import Ingestor
+from ingestion.scanner import DEFAULT_MAX_SIZE, IGNORE_FILES, IgnoreMatcher, scan, wanted_file
+
+# inotify event flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+# struct inotify_event header: wd, mask, cookie, name length
+_EVENT = struct.Struct("iIII")
+
+# default seconds between scans of the polling backend
+POLL_INTERVAL = 2.0
+
+
+class Overflow(Exception):
+    """Events were lost (inotify queue overflow): the whole tree must be re-checked."""
+
+
+class InotifyBackend:
+    """Change events from inotify, with a watch on every directory of the tree."""
+
+    def __init__(self, root: str, max_size: int = DEFAULT_MAX_SIZE):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch, self._rm_watch = libc.inotify_add_watch, libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.max_size = max_size
+        self.paths: Dict[int, str] = {}
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+        self.watch_tree(root)
+
+    def watch_tree(self, top: str):
+        """Watch a directory and every directory below it that is not ignored."""
+        for directory in scan(self.root, max_size=self.max_size, top=top, dirs=True):
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                # the directory may be gone already; anything else (ENOSPC) is fatal
+                if code in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(code, f"cannot watch {directory}: {os.strerror(code)} "
+                                    f"(raise fs.inotify.max_user_watches)")
+            self.paths[wd] = directory
+
+    def _unwatch_tree(self, top: str):
+        """Stop watching a directory moved away (its watches would follow it)."""
+        prefix = top + os.sep
+        for wd, path in list(self.paths.items()):
+            if path == top or path.startswith(prefix):
+                self._rm_watch(self.fd, wd)
+                del self.paths[wd]
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """
+        Wait up to `timeout` seconds (None: forever) for events.
+
+        Returns:
+            The paths created, modified, deleted or renamed, empty on timeout
+        """
+        if not self._poll.poll(None if timeout is None else int(timeout * 1000)):
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    raise Overflow()
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                    continue
+                directory = self.paths.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Change events from comparing periodic scans of the tree (sizes and modification times)."""
+
+    def __init__(self, root: str, max_size: int = DEFAULT_MAX_SIZE, interval: float = POLL_INTERVAL):
+        self.root = root
+        self.max_size = max_size
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for path in scan(self.root, max_size=self.max_size):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def watch_tree(self, top: str):
+        pass
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Scan again after `timeout` seconds (at most the interval), or until something changed."""
+        while True:
+            time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+            snapshot = self._snapshot()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or timeout is not None:
+                return changed
+
+    def close(self):
+        pass
+
+
+class Watcher:
+    """
+    Re-embed the files of a folder as they change, until interrupted.
+
+    Args:
+        root: Folder to watch
+        ingestor: Ingestor embedding the changed files (its workers, batch size and chunker apply)
+        debounce: Seconds without events before a burst of changes is indexed
+        max_delay: Seconds after which a continuing burst is indexed anyway
+        backend: "auto" (inotify where available), "inotify" or "poll"
+        poll_interval: Seconds between scans of the polling backend
+        max_file_size: Files larger than this many bytes are skipped (0: no limit)
+    """
+
+    def __init__(self, root: str, ingestor: Ingestor, debounce: float = 1.0, max_delay: float = 30.0,
+                 backend: str = "auto", poll_interval: float = POLL_INTERVAL,
+                 max_file_size: int = DEFAULT_MAX_SIZE):
+        if backend not in ("auto", "inotify", "poll"):
+            raise ValueError(f"unknown backend '{backend}' (expected auto, inotify or poll)")
+        self.root = os.path.abspath(root)
+        self.ingestor = ingestor
+        self.debounce = debounce
+        self.max_delay = max(max_delay, debounce)
+        self.backend_name = backend
+        self.poll_interval = poll_interval
+        self.max_file_size = max_file_size
+        self.matcher = IgnoreMatcher(self.root)
+        self.backend = None
+
+    def _start_backend(self):
+        """Start inotify when possible, falling back to polling."""
+        if self.backend_name != "poll" and sys.platform.startswith("linux"):
+            try:
+                self.backend = InotifyBackend(self.root, self.max_file_size)
+                self.ingestor.progress.message(
+                    f"👀 Watching {self.root} ({len(self.backend.paths)} directories, inotify)")
+                return
+            except (OSError, AttributeError) as e:
+                if self.backend_name == "inotify":
+                    raise
+                self.ingestor.progress.message(
+                    f"⚠️  inotify unavailable ({e}), polling every {self.poll_interval:g}s instead")
+        elif self.backend_name == "inotify":
+            raise OSError("inotify is only available on Linux")
+        self.backend = PollingBackend(self.root, self.max_file_size, self.poll_interval)
+        self.ingestor.progress.message(f"👀 Watching {self.root} (polling every {self.poll_interval:g}s)")
+
+    def sync(self):
+        """Bring the whole folder up to date, as `carpet embed` does."""
+        self.ingestor.open_folder(self.root, max_file_size=self.max_file_size)
+
+    def collect(self) -> Set[str]:
+        """Block until something changes, then gather the burst until it quiets down."""
+        changed = self.backend.wait(None)
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return changed
+            more = self.backend.wait(min(self.debounce, remaining))
+            if not more:
+                return changed
+            changed |= more
+
+    def apply(self, changed: Iterable[str]):
+        """Embed the changed files that exist and delete the chunks of those that are gone."""
+        changed = sorted(changed)
+        if any(os.path.basename(path) in IGNORE_FILES for path in changed):
+            # ignore rules changed: what is indexed and watched may change anywhere below
+            self.ingestor.progress.message("📝 Ignore rules changed, re-checking the folder")
+            self.matcher.invalidate()
+            self.backend.watch_tree(self.root)
+            self.sync()
+            return
+
+        files, removed = [], []
+        for path in changed:
+            try:
+                if not os.path.lexists(path):
+                    # deleted or renamed away: a file, or a folder of files
+                    removed.extend(Manifest.paths_under(path))
+                    if Manifest.get(path) is not None:
+                        removed.append(path)
+                elif os.path.isdir(path) and not os.path.islink(path):
+                    # created or moved in: watch it and index what it already holds
+                    if not self.matcher.ignored(path, True):
+                        self.backend.watch_tree(path)
+                        files.extend(scan(self.root, max_size=self.max_file_size, top=path))
+                elif os.path.isfile(path) and not self.matcher.ignored(path, False):
+                    if wanted_file(path, os.path.getsize(path), self.max_file_size):
+                        files.append(path)
+            except OSError:
+                continue
+
+        # temporary files (editor swap files, build outputs) are often gone again by now
+        files = [path for path in dict.fromkeys(files) if os.path.exists(path)]
+        if not (removed or files):
+            return
+
+        progress = self.ingestor.progress
+        progress.start(total=len(files))
+        try:
+            if removed:
+                removed = sorted(set(removed))
+                DbManager.deleteByFiles(removed)
+                progress.files_removed(len(removed))
+            if files:
+                try:
+                    self.ingestor.embed_files(files)
+                except Exception as e:
+                    # one bad batch of changes must not end the watch; its files are retried
+                    # by the next change or the next full pass
+                    for path in files:
+                        progress.error(path, f"embedding failed: {e}")
+
+            from search.memory_index import MemoryIndex
+            if MemoryIndex.exists():
+                MemoryIndex().refresh()
+        finally:
+            progress.finish()
+
+    def run(self):
+        """Index the folder once, then follow its changes until interrupted."""
+        # watch first, so changes made during the initial pass are not missed
+        self._start_backend()
+        try:
+            self.sync()
+            while True:
+                try:
+                    changed = self.collect()
+                except Overflow:
+                    self.ingestor.progress.message("⚠️  Too many changes at once, re-checking the folder")
+                    self.backend.watch_tree(self.root)
+                    self.sync()
+                    continue
+                self.apply(changed)
+        finally:
+            self.backend.close()
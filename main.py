@@ -2,19 +2,10 @@
 import sys
 import os
 
-from database.setup_chroma_db import setup_chroma
-from database.db_manager import DbManager
-from ingestion.ingestor import Ingestor
-from ollama_manager.ollama import Ollama
-from embedding.display import Display
-from embedding.embedder import Embedder
-
-# init or connect to Chroma
-from chromadb import PersistentClient
-
-# from search_db import search_vector_db
-
-# dotenv removed: no environment file loading required
+# Heavy modules (chromadb, ollama, numpy, PyPDF2) are imported inside the
+# command that needs them, so `carpet` resolves the command and handles usage
+# errors or forwarded searches without paying for them. The Chroma store is
+# opened on first use through database.setup_chroma_db.
 
 import logging
 
@@ -23,18 +14,68 @@ import logging
 # telemetry, but this prevents the startup INFO line from printing.
 logging.getLogger("chromadb.telemetry.product.posthog").setLevel(logging.WARNING)
 
-# GLOBAL DB in home directory
-HOME = os.path.expanduser("~")
-db_path = os.path.join(HOME, "chroma_store")
+# httpx logs every request to the ollama server at INFO, one line per
+# embedding batch, which would break up the embed progress line.
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
-if not os.path.exists(db_path) or not os.listdir(db_path):
-    client, collection = setup_chroma(db_path)
-else:
-    client = PersistentClient(path=db_path)
-    collection = client.get_or_create_collection("user_files")
+
+def get_option(name: str, default, cast=int):
+    """
+    Read a `--name N` / `--name=N` option from argv, removing it. A value that
+    does not convert (e.g. `--files x`) ends the command with a usage error.
+    """
+    flag = f"--{name}"
+    for i, arg in enumerate(sys.argv):
+        if arg == flag and i + 1 < len(sys.argv):
+            value = sys.argv[i + 1]
+            del sys.argv[i:i + 2]
+        elif arg.startswith(flag + "="):
+            value = arg.split("=", 1)[1]
+            del sys.argv[i]
+        else:
+            continue
+        try:
+            return cast(value)
+        except ValueError:
+            kind = {int: "a whole number", float: "a number"}.get(cast, "a valid value")
+            sys.exit(f"❌ Invalid value for {flag}: '{value}' (expected {kind})")
+    return default
+
+
+def get_flag(name: str) -> bool:
+    """Read a bare `--name` switch from argv, removing it."""
+    flag = f"--{name}"
+    if flag in sys.argv:
+        sys.argv.remove(flag)
+        return True
+    return False
 
 
 def main():
+    # --profile / --profile-out / --cprofile apply to every command
+    profile = get_flag("profile")
+    profile_out = get_option("profile-out", None, cast=str)
+    cprofile_out = get_option("cprofile", None, cast=str)
+    if not (profile or profile_out or cprofile_out):
+        run()
+        return
+
+    from profiling import metrics
+    if profile or profile_out:
+        metrics.enable()
+    try:
+        with metrics.CProfile(cprofile_out):
+            run()
+    finally:
+        if profile:
+            print("\n⏱️  Profile")
+            print(metrics.summary_table())
+        if profile_out:
+            metrics.dump(profile_out)
+            print(f"⏱️  Profile written to {profile_out}")
+
+
+def run():
     if len(sys.argv) < 2:
         print("Usage: carpet <command> [args]")
         return
@@ -42,45 +83,172 @@ def main():
     command = sys.argv[1].lower()
 
     if command == "ollama":
+        from ollama_manager.ollama import Ollama
         Ollama.start()
         return
     
     if command == "model":
+        from ollama_manager.ollama import Ollama
         Ollama.check_model()
         return
 
-    if command == "embed":
+    if command in ("embed", "watch"):
+        from ingestion.ingestor import Ingestor
+        from ollama_manager.ollama import Ollama
 
         #check for ollama installation
         if not Ollama.start_from_embed():
             Ollama.start()
 
+        batch_size = get_option("batch-size", 64)
+        cache_size = get_option("cache-size", 100_000)
+        workers = get_option("workers", os.cpu_count() or 1)
+        queue_size = get_option("queue-size", 16)
+        concurrency = get_option("concurrency", 4)
+        chunker = get_option("chunker", None, cast=str)
+        extract_timeout = get_option("extract-timeout", 120, cast=float)
+        extract_memory = get_option("extract-memory", 2048)
+        max_file_size = int(get_option("max-file-size", 100, cast=float) * 2 ** 20)
+        quiet = get_flag("quiet")
+        json_log = get_flag("json-log")
+
+        chunker_config = None
+        if chunker:
+            from extract.chunker import parse_chunker_config
+            try:
+                chunker_config = parse_chunker_config(chunker)
+            except ValueError as e:
+                print(f"❌ Invalid --chunker: {e}")
+                return
+
+        from profiling.progress import Progress
+        progress = Progress("json" if json_log else "quiet" if quiet else "auto")
+
         cwd = os.getcwd()
-        ingestor = Ingestor()
-        ingestor.open_folder(cwd)
-        print(f"Found {len(ingestor.file_paths)} files to embed.")
+        ingestor = Ingestor(batch_size=batch_size, cache_size=cache_size,
+                            workers=workers, queue_size=queue_size, concurrency=concurrency,
+                            chunker=chunker_config, extract_timeout=extract_timeout,
+                            extract_memory=extract_memory, progress=progress)
+
+        if command == "watch":
+            from ingestion.watcher import Watcher
+            debounce = get_option("debounce", 1.0, cast=float)
+            backend = get_option("backend", "auto", cast=str)
+            poll_interval = get_option("poll-interval", 2.0, cast=float)
+            folder = os.path.abspath(sys.argv[2]) if len(sys.argv) >= 3 else cwd
+            if not os.path.isdir(folder):
+                print(f"❌ Not a folder: {folder}")
+                return
+            try:
+                watcher = Watcher(folder, ingestor, debounce=debounce, backend=backend,
+                                  poll_interval=poll_interval, max_file_size=max_file_size)
+                watcher.run()
+            except KeyboardInterrupt:
+                progress.message("👋 Stopped watching")
+            except (OSError, ValueError) as e:
+                print(f"❌ Cannot watch {folder}: {e}")
+            return
+
+        resume = get_flag("resume")
+        ingestor.open_folder(cwd, max_file_size=max_file_size, resume=resume)
         return
 
     if command == "search":
+        concurrency = get_option("concurrency", 4)
+        port = get_option("port", None)
+        engine = get_option("engine", "hnsw", cast=str)
+        files = get_option("files", None)
+        agg = get_option("agg", "max", cast=str)
+        mode = get_option("mode", "vector", cast=str)
+        query_cache = get_option("query-cache", 10_000)
+        query_ttl = get_option("query-ttl", None, cast=float)
+        n_results = get_option("n-results", 5)
+        query_file = get_option("file", None, cast=str)
+        output = get_option("output", None, cast=str)
+        batch_size = get_option("batch-size", 64)
+        
+        from embedding.query_cache import DEFAULT_TTL, QueryCache, search_params
+        query_ttl = query_ttl if query_ttl is not None else DEFAULT_TTL
+        
+        # Batch mode: one query per line, results as JSON Lines
+        if query_file:
+            from embedding.embedder import Embedder
+            source = sys.stdin if query_file == "-" else open(query_file, encoding="utf-8")
+            with source:
+                queries = [line.strip() for line in source if line.strip()]
+            embedder = Embedder(concurrency=concurrency, query_cache_size=query_cache, query_ttl=query_ttl)
+            sink = open(output, "w", encoding="utf-8") if output else sys.stdout
+            try:
+                count = embedder.search_batch(queries, sink, n_results=n_results, engine=engine, mode=mode,
+                                              files=files, agg=agg, batch_size=batch_size)
+            except Exception as e:
+                print(f"❌ Error during batch search: {e}", file=sys.stderr)
+                return
+            finally:
+                if output:
+                    sink.close()
+            if output:
+                print(f"✅ Wrote results of {count} queries to {output}")
+            return
+        
         if len(sys.argv) < 3:
             print("Usage: carpet search <query>")
             return
         query = " ".join(sys.argv[2:])
         
+        from server.search_server import DEFAULT_PORT, SearchServer
+        port = port or DEFAULT_PORT
+        
+        # Use the search server when `carpet serve` is running
+        try:
+            results = SearchServer.forward(query, n_results=n_results, port=port, engine=engine,
+                                           files=files, agg=agg, mode=mode)
+        except Exception as e:
+            print(f"❌ Error during search: {e}")
+            return
+        
+        # A repeated query whose results are still valid needs neither the store nor the model
+        if results is None and query_cache > 0:
+            from database.manifest import Manifest
+            cache = QueryCache(max_entries=query_cache, ttl=query_ttl)
+            params = search_params(n_results, engine=engine, mode=mode, files=files, agg=agg)
+            results = cache.get_results(query, params, Manifest.generation())
+        
+        if results is not None:
+            from embedding.results import print_files, print_results
+            print(f"🔍 Searching for: {query}")
+            if files:
+                print_files(results)
+            else:
+                print_results(results)
+            return
+        
         # Create embedder and search
-        embedder = Embedder()
-        results = embedder.search(query)
+        from embedding.embedder import Embedder
+        embedder = Embedder(concurrency=concurrency, query_cache_size=query_cache, query_ttl=query_ttl)
+        results = embedder.search(query, n_results, engine=engine, files=files, agg=agg, mode=mode)
+        return
+
+    if command == "serve":
+        from server.search_server import DEFAULT_PORT, SearchServer
+        port = get_option("port", DEFAULT_PORT)
+        SearchServer.serve(port)
         return
     
     if command == "db":
+        from embedding.display import Display
         display = Display()
         
+        limit = get_option("limit", None)
+        offset = get_option("offset", 0)
+        source = get_option("source", None, cast=os.path.abspath)
+        
         # Check for subcommands
         if len(sys.argv) >= 3:
             subcommand = sys.argv[2].lower()
             
             if subcommand == "sources":
-                display.show_sources()
+                display.show_sources(source=source)
             elif subcommand == "stats":
                 display.show_stats()
             elif subcommand == "clear":
@@ -90,19 +258,35 @@ def main():
                 print("Available: sources, stats, clear")
         else:
             # Default: show all
-            display.show_all()
+            display.show_all(limit=limit, offset=offset, source=source)
         return
     
     if command == "delete":
         if len(sys.argv) < 3:
-            print("Usage: carpet delete <filepath>")
+            print("Usage: carpet delete <filepath|folder|glob>")
             return
         
-        filepath = sys.argv[2]
+        from database.db_manager import DbManager
+
+        # sources are stored as absolute paths
+        filepath = os.path.abspath(sys.argv[2])
+        
+        # Glob patterns and folders delete every matching file at once
+        if any(c in sys.argv[2] for c in "*?["):
+            deleted = DbManager.deleteByGlob(filepath)
+            if deleted:
+                print(f"✅ Successfully deleted {deleted} file(s) matching {filepath} from database")
+            else:
+                print(f"❌ No files in database match: {filepath}")
+            return
         
         # Check if file exists in database first
         if not DbManager.checkKey(filepath):
-            print(f"❌ File not found in database: {filepath}")
+            deleted = DbManager.deleteByFolder(filepath)
+            if deleted:
+                print(f"✅ Successfully deleted {deleted} file(s) under {filepath} from database")
+            else:
+                print(f"❌ File not found in database: {filepath}")
             return
         
         # Delete the file and all its chunks
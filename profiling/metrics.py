@@ -0,0 +1,230 @@
+"""
+Lightweight instrumentation of carpet's pipeline stages, behind `--profile`.
+
+Stages are timed with `timer(name)` (a context manager) or `timed_iter(name, it)`
+(time spent producing the items of a stream), and volumes are counted with
+`count(name, n)`. Each stage keeps a latency histogram with logarithmic
+buckets, from which the summary table estimates percentiles, and can be dumped
+as JSON or in the Prometheus text format.
+
+Collection is off unless enable() is called: timer() then returns a shared
+no-op context manager and timed_iter() the stream itself, so instrumented code
+pays a function call per stage and nothing per chunk. Only the calling process
+is measured; with extraction workers, `extract.wait` is the time the pipeline
+waited for them.
+"""
+import contextlib
+import json
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+_enabled = False
+_started = 0.0
+_lock = threading.Lock()
+_NULL = contextlib.nullcontext()
+
+# histogram bucket upper bounds in seconds: 50µs doubling up to ~7 minutes
+BUCKETS = tuple(0.00005 * 2 ** i for i in range(24))
+
+
+class Histogram:
+    """Latency distribution of one stage."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile, interpolating inside its bucket (capped by the maximum)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q / 100 * self.count, 0
+        for i, n in enumerate(self.buckets[:-1]):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                return min(lower + (BUCKETS[i] - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+_timers: Dict[str, Histogram] = {}
+_counters: Dict[str, float] = {}
+
+
+def enable():
+    """Start collecting (and forget anything collected before)."""
+    global _enabled, _started
+    _timers.clear()
+    _counters.clear()
+    _started = time.perf_counter()
+    _enabled = True
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def observe(name: str, seconds: float):
+    """Record one call of a stage that took `seconds`."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _timers.get(name)
+        if histogram is None:
+            histogram = _timers[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter (files, chunks, bytes, ...)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timer(name: str):
+    """Context manager timing one call of a stage."""
+    return _Timer(name) if _enabled else _NULL
+
+
+def timed_iter(name: str, items: Iterable) -> Iterable:
+    """Time spent producing all the items of a stream, recorded as one call when it ends."""
+    if not _enabled:
+        return items
+    return _timed_iter(name, items)
+
+
+def _timed_iter(name: str, items: Iterable) -> Iterator:
+    elapsed, iterator = 0.0, iter(items)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                return
+            elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        observe(name, elapsed)
+
+
+def snapshot() -> dict:
+    """Everything collected so far, as plain data."""
+    with _lock:
+        return {
+            'wall_seconds': time.perf_counter() - _started if _enabled else 0.0,
+            'timers': {name: {
+                'count': h.count,
+                'total_seconds': h.total,
+                'mean_seconds': h.total / h.count if h.count else 0.0,
+                'p50_seconds': h.percentile(50),
+                'p95_seconds': h.percentile(95),
+                'p99_seconds': h.percentile(99),
+                'max_seconds': h.max,
+                'buckets': dict(zip([*map(str, BUCKETS), "+Inf"], h.buckets)),
+            } for name, h in sorted(_timers.items())},
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def summary_table() -> str:
+    """Per-stage calls, total time, share of the wall time and latency percentiles, then the counters."""
+    data = snapshot()
+    wall = data['wall_seconds'] or 1.0
+    lines = [f"{'stage':<24} {'calls':>8} {'total s':>9} {'% wall':>7} {'mean ms':>9} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>9}"]
+    for name, t in data['timers'].items():
+        lines.append(f"{name:<24} {t['count']:>8} {t['total_seconds']:>9.3f} {t['total_seconds'] / wall:>7.1%} "
+                     f"{t['mean_seconds'] * 1000:>9.2f} {t['p50_seconds'] * 1000:>8.2f} "
+                     f"{t['p95_seconds'] * 1000:>8.2f} {t['max_seconds'] * 1000:>9.2f}")
+    for name, value in data['counters'].items():
+        lines.append(f"{name:<24} {value:>14,.0f}  ({value / wall:,.1f}/s)")
+    lines.append(f"{'wall':<24} {data['wall_seconds']:>18.3f} s")
+    return "\n".join(lines)
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text() -> str:
+    """Everything collected, in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = ["# TYPE carpet_stage_seconds histogram"]
+    for name, t in data['timers'].items():
+        cumulative = 0
+        for bound, n in t['buckets'].items():
+            cumulative += n
+            lines.append(f'carpet_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'carpet_stage_seconds_sum{{stage="{name}"}} {t["total_seconds"]}')
+        lines.append(f'carpet_stage_seconds_count{{stage="{name}"}} {t["count"]}')
+    for name, value in data['counters'].items():
+        metric = f"carpet_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str):
+    """Write everything collected to a file: Prometheus text for .prom/.txt, JSON otherwise."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(prometheus_text())
+        else:
+            json.dump(snapshot(), f, indent=2)
+
+
+class CProfile:
+    """Opt-in cProfile session around a command, saved for `python -m pstats`."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._profile = None
+
+    def __enter__(self):
+        if self.path:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.path)
+            print(f"🧪 cProfile stats written to {self.path} (view with: python -m pstats {self.path})")
+        return False
+
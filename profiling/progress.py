@@ -0,0 +1,260 @@
+"""
+Progress of an embedding run, reported without a print per file or chunk.
+
+The pipeline only bumps counters (files found, embedded or unchanged, chunks
+written, errors); a background thread renders them at a fixed rate, so the
+cost of reporting does not grow with the number of files:
+
+    line   - one status line redrawn in place (interactive terminals)
+    log    - a status line every LOG_INTERVAL seconds (output redirected to a file)
+    quiet  - nothing but the summary
+    json   - one JSON object per line: progress every LOG_INTERVAL seconds, each
+             file embedded and each error as it happens, then the summary
+
+Errors are collected and listed in the summary at the end of the run instead
+of being interleaved with the output.
+"""
+import json
+import shutil
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO, Tuple
+
+MODES = ("auto", "line", "log", "quiet", "json")
+
+# seconds between redraws of the status line, and between lines of the log and json modes
+LINE_INTERVAL = 0.2
+LOG_INTERVAL = 10.0
+
+# errors listed by the text summary (the json summary lists all of them)
+MAX_LISTED_ERRORS = 20
+
+
+def format_duration(seconds: float) -> str:
+    """42s, 4m12s, 1h03m."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """
+    Counters of an embedding run and their display.
+
+    Args:
+        mode: "auto" (line on a terminal, log otherwise), "line", "log", "quiet" or "json"
+        stream: Where to write (stdout by default)
+    """
+
+    def __init__(self, mode: str = "auto", stream: Optional[TextIO] = None):
+        if mode not in MODES:
+            raise ValueError(f"unknown progress mode '{mode}' (expected {', '.join(MODES)})")
+        self._stream = stream
+        if mode == "auto":
+            mode = "line" if self.stream.isatty() else "log"
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._active = False
+        self._drawn = False
+        self._reset()
+
+    def _reset(self, total: Optional[int] = None, estimate: int = 0):
+        self.started = time.monotonic()
+        # files found so far; the total is known once the scan is over
+        self.seen = total or 0
+        self.scanned = total is not None
+        # files of the previous run, a guess at the total while the scan goes on
+        self.estimate = estimate
+        self.embedded = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.removed = 0
+        self.errors: List[Tuple[str, str]] = []
+        self._failed = set()
+
+    @property
+    def stream(self) -> TextIO:
+        # stdout is looked up on every write, so redirecting it (contextlib.redirect_stdout) works
+        return self._stream or sys.stdout
+
+    @property
+    def running(self) -> bool:
+        return self._active
+
+    def start(self, total: Optional[int] = None, estimate: int = 0):
+        """
+        Reset the counters and start displaying them.
+
+        Args:
+            total: Number of files to go through, when known upfront (otherwise
+                counted with file_seen until scan_finished)
+            estimate: Expected number of files, used for the ETA until the scan is over
+        """
+        self.finish(summary=False)
+        self._reset(total, estimate)
+        self._active = True
+        interval = {"line": LINE_INTERVAL, "log": LOG_INTERVAL, "json": LOG_INTERVAL}.get(self.mode)
+        if interval is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+            self._thread.start()
+
+    def finish(self, summary: bool = True):
+        """Stop the display and print the summary of the run."""
+        if not self._active:
+            return
+        self._active = False
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._clear()
+            if summary:
+                self._summary()
+
+    def _loop(self, interval: float):
+        while not self._stop.wait(interval):
+            with self._lock:
+                self._render()
+
+    def file_seen(self):
+        self.seen += 1
+
+    def scan_finished(self):
+        self.scanned = True
+
+    def file_skipped(self):
+        """A file found unchanged since it was last embedded."""
+        self.skipped += 1
+
+    def file_done(self, path: str, chunks: int):
+        """A file whose chunks are all written and which is recorded in the manifest."""
+        self.embedded += 1
+        if self.mode == "json":
+            self._emit({'event': "file", 'path': path, 'chunks': chunks})
+
+    def chunks_written(self, count: int):
+        self.chunks += count
+
+    def files_removed(self, count: int):
+        self.removed += count
+
+    def error(self, path: str, message: str):
+        """A file that could not be embedded; it is retried on the next run."""
+        self._failed.add(path)
+        if self.mode == "json":
+            self._emit({'event': "error", 'path': path, 'error': message})
+            self.errors.append((path, message))
+        elif self.running:
+            self.errors.append((path, message))
+        else:
+            # outside a run there is no summary to collect it in
+            self.message(f"❌ {path}: {message}")
+
+    def message(self, text: str):
+        """A one-off note (resume, cleanup, watcher events), kept out of the quiet mode."""
+        if self.mode == "quiet":
+            return
+        if self.mode == "json":
+            self._emit({'event': "message", 'text': text})
+            return
+        with self._lock:
+            self._clear()
+            print(text, file=self.stream, flush=True)
+            if self.running and self.mode == "line":
+                self._render()
+
+    def counts(self) -> dict:
+        done = self.embedded + self.skipped + len(self._failed)
+        elapsed = time.monotonic() - self.started
+        total = self.seen if self.scanned else max(self.seen, self.estimate)
+        eta = None
+        if done and total > done and elapsed > 0 and (self.scanned or self.estimate):
+            eta = (total - done) * elapsed / done
+        return {
+            'files': done,
+            'total': total,
+            'scanned': self.scanned,
+            'embedded': self.embedded,
+            'unchanged': self.skipped,
+            'failed': len(self._failed),
+            'removed': self.removed,
+            'chunks': self.chunks,
+            'chunks_per_second': self.chunks / elapsed if elapsed > 0 else 0.0,
+            'elapsed_seconds': elapsed,
+            'eta_seconds': eta,
+        }
+
+    def status(self) -> str:
+        """One line: files done out of the total, chunks, chunks/s, ETA and errors."""
+        c = self.counts()
+        if c['scanned']:
+            total = f"{c['total']:,}"
+        elif self.estimate > self.seen:
+            total = f"~{c['total']:,}"
+        else:
+            total = f"{c['total']:,}+"
+        line = (f"⏳ {c['files']:,}/{total} files · {c['chunks']:,} chunks · "
+                f"{c['chunks_per_second']:,.0f} chunks/s")
+        if c['eta_seconds'] is not None:
+            line += f" · ETA {format_duration(c['eta_seconds'])}"
+        if c['failed']:
+            line += f" · {c['failed']:,} errors"
+        return line
+
+    def _render(self):
+        if self.mode == "line":
+            width = shutil.get_terminal_size().columns - 1
+            self.stream.write("\r" + self.status()[:width] + "\033[K")
+            self.stream.flush()
+            self._drawn = True
+        elif self.mode == "log":
+            print(self.status(), file=self.stream, flush=True)
+        elif self.mode == "json":
+            self._emit({'event': "progress", **self.counts()}, lock=False)
+
+    def _clear(self):
+        if self._drawn:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+            self._drawn = False
+
+    def _emit(self, event: dict, lock: bool = True):
+        line = json.dumps({'time': round(time.time(), 3), **event}, ensure_ascii=False)
+        if lock:
+            with self._lock:
+                print(line, file=self.stream, flush=True)
+        else:
+            print(line, file=self.stream, flush=True)
+
+    def _summary(self):
+        c = self.counts()
+        if self.mode == "json":
+            self._emit({'event': "done", **c,
+                        'errors': [{'path': path, 'error': message} for path, message in self.errors]},
+                       lock=False)
+            return
+
+        parts = [f"{c['embedded']:,} file(s) embedded ({c['chunks']:,} chunks)"]
+        if c['unchanged']:
+            parts.append(f"{c['unchanged']:,} unchanged")
+        if c['removed']:
+            parts.append(f"{c['removed']:,} removed")
+        if c['failed']:
+            parts.append(f"{c['failed']:,} failed")
+        icon = "⚠️ " if c['failed'] else "✅"
+        print(f"{icon} {', '.join(parts)} in {format_duration(c['elapsed_seconds'])}",
+              file=self.stream, flush=True)
+
+        for path, message in self.errors[:MAX_LISTED_ERRORS]:
+            print(f"   ❌ {path}: {message}", file=self.stream)
+        if len(self.errors) > MAX_LISTED_ERRORS:
+            print(f"   ... and {len(self.errors) - MAX_LISTED_ERRORS:,} more", file=self.stream)
+        self.stream.flush()
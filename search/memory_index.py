@@ -0,0 +1,405 @@
+import os
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database import setup_chroma_db
+from database.manifest import Manifest
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (or a single vector) as float32, leaving zero vectors as they are."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int, excluded: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k rows of a normalized matrix by cosine similarity to a normalized query.
+
+    Args:
+        matrix: (n, dim) float32 matrix of normalized rows
+        query: (dim,) normalized query vector
+        k: Number of rows to return
+        excluded: Row numbers that must not be returned
+
+    Returns:
+        (row numbers, similarities), best first
+    """
+    scores = matrix @ query
+    if excluded is not None and len(excluded):
+        scores[excluded] = -np.inf
+        k = min(k, len(scores) - len(excluded))
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    # argpartition finds the k best in linear time; only those k are sorted
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates])]
+    return order, scores[order]
+
+
+def quantization_scales(matrix: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+    """Per-dimension int8 scales: the largest magnitude of each dimension maps to 127."""
+    peak = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), block_rows):
+        np.maximum(peak, np.abs(matrix[start:start + block_rows]).max(axis=0), out=peak)
+    peak[peak == 0] = 1
+    return peak / 127
+
+
+def quantize(vectors: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Scalar-quantize vectors to int8 codes, clipping values beyond the scales' range."""
+    return np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+
+
+def quantized_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray,
+                     block_rows: int = 4096) -> np.ndarray:
+    """
+    Approximate dot products of a query with int8-coded rows.
+
+    Folding the scales into the query turns dequantization into a single product
+    per row; codes are widened to float32 one block at a time, so the scan only
+    ever holds a few megabytes beyond the codes themselves.
+    """
+    scaled_query = (query * scales).astype(np.float32)
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        block = codes[start:start + block_rows]
+        scores[start:start + len(block)] = block.astype(np.float32) @ scaled_query
+    return scores
+
+
+def quantized_top_k(matrix: np.ndarray, codes: np.ndarray, scales: np.ndarray, query: np.ndarray,
+                    k: int, candidates: int, excluded: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows by scanning int8 codes, then re-ranking the best candidates with their
+    float32 rows.
+
+    Args:
+        matrix: (n, dim) float32 matrix of normalized rows, typically memory-mapped
+        codes: (n, dim) int8 codes of the same rows
+        scales: (dim,) quantization scales of the codes
+        query: (dim,) normalized query vector
+        k: Number of rows to return
+        candidates: Number of rows re-ranked at full precision (at least k)
+        excluded: Row numbers that must not be returned
+
+    Returns:
+        (row numbers, exact similarities), best first
+    """
+    scores = quantized_scores(codes, scales, query)
+    if excluded is not None and len(excluded):
+        scores[excluded] = -np.inf
+    candidates = min(max(candidates, k), len(scores) - (0 if excluded is None else len(excluded)))
+    if candidates <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    # only the candidates' float32 rows are read, in file order
+    rows = np.sort(np.argpartition(-scores, candidates - 1)[:candidates])
+    order, exact = top_k(np.asarray(matrix[rows]), query, k)
+    return rows[order], exact
+
+
+class MemoryIndex:
+    """
+    Snapshot of every embedding in the collection as one contiguous, L2-normalized
+    float32 matrix, memory-mapped from a cache file and searched exactly with a
+    single matrix-vector product.
+
+    Rows are appended as files are embedded; rows of modified or deleted files are
+    only marked dead (and skipped at query time) until they make up a quarter of
+    the file, when it is compacted. A SQLite table maps rows to chunk ids and tracks
+    the content hash each source was indexed with, so refresh() only fetches the
+    vectors of files that changed since the last manifest generation it saw.
+
+    Optionally the rows are also kept as int8 codes with per-dimension scales, a
+    quarter of the float32 size. Quantized queries scan the codes and re-rank only
+    the best candidates with their full-precision rows, so the float32 file is
+    paged in a few rows at a time instead of as a whole.
+    """
+
+    # fraction of dead rows that triggers a compaction
+    COMPACT_RATIO = 0.25
+
+    # quantized queries re-rank this many candidates per requested result
+    RERANK_FACTOR = 10
+
+    def __init__(self, index_dir: Optional[str] = None):
+        if index_dir is None:
+            index_dir = os.path.join(setup_chroma_db.CHROMA_PATH, "memory_index")
+        os.makedirs(index_dir, exist_ok=True)
+
+        self.path = index_dir
+        self._vectors_path = os.path.join(index_dir, "vectors.f32")
+        self._codes_path = os.path.join(index_dir, "codes.i8")
+        self._scales_path = os.path.join(index_dir, "scales.f32")
+        self._conn = sqlite3.connect(os.path.join(index_dir, "rows.sqlite3"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                alive INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS rows_source ON rows (source);
+            CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, content_hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self._conn.commit()
+
+        self.matrix: Optional[np.memmap] = None
+        self.codes: Optional[np.memmap] = None
+        self.scales: Optional[np.ndarray] = None
+        self.dead = np.empty(0, dtype=np.int64)
+        self._open()
+
+    @staticmethod
+    def exists(index_dir: Optional[str] = None) -> bool:
+        """Check if a memory index was ever built, i.e. whether it should be kept fresh."""
+        if index_dir is None:
+            index_dir = os.path.join(setup_chroma_db.CHROMA_PATH, "memory_index")
+        return os.path.exists(os.path.join(index_dir, "rows.sqlite3"))
+
+    def _meta(self, name: str) -> Optional[int]:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: int):
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _row_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    @property
+    def quantized(self) -> bool:
+        """Whether int8 codes are kept next to the float32 rows."""
+        return os.path.exists(self._scales_path)
+
+    def _open(self):
+        """Map the vector and code files and load the dead row numbers."""
+        self.matrix = None
+        self.codes = None
+        dim = self._meta('dim')
+        rows = self._row_count()
+        if dim and rows:
+            self.matrix = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(rows, dim))
+            # codes that do not match the rows (an interrupted refresh) are left unmapped,
+            # so the next quantized search rebuilds them
+            if self.quantized and os.path.exists(self._codes_path) \
+                    and os.path.getsize(self._codes_path) == rows * dim:
+                self.scales = np.fromfile(self._scales_path, dtype=np.float32)
+                self.codes = np.memmap(self._codes_path, dtype=np.int8, mode='r', shape=(rows, dim))
+        self.dead = np.array(
+            [row for (row,) in self._conn.execute("SELECT row FROM rows WHERE alive = 0")], dtype=np.int64
+        )
+
+    def refresh(self, batch_size: int = 50) -> int:
+        """
+        Bring the snapshot up to date with the collection.
+
+        Args:
+            batch_size: Number of files whose vectors are fetched per ChromaDB request
+
+        Returns:
+            int: Number of files (re)indexed
+        """
+        generation = Manifest.generation()
+        if self._meta('generation') == generation:
+            return 0
+
+        current = Manifest.content_hashes()
+        indexed = dict(self._conn.execute("SELECT source, content_hash FROM sources"))
+        stale = [source for source, content_hash in indexed.items() if current.get(source) != content_hash]
+        fresh = [path for path, content_hash in current.items() if indexed.get(path) != content_hash]
+
+        for start in range(0, len(stale), 500):
+            part = stale[start:start + 500]
+            marks = ','.join('?' * len(part))
+            self._conn.execute(f"UPDATE rows SET alive = 0 WHERE source IN ({marks})", part)
+            self._conn.execute(f"DELETE FROM sources WHERE source IN ({marks})", part)
+
+        collection = setup_chroma_db.get_collection()
+        rows = self._row_count()
+        # drop vectors appended by an interrupted refresh that never committed their rows
+        if os.path.exists(self._vectors_path) and self._meta('dim'):
+            with open(self._vectors_path, 'r+b') as f:
+                f.truncate(rows * self._meta('dim') * 4)
+
+        with open(self._vectors_path, 'ab') as f:
+            for start in range(0, len(fresh), batch_size):
+                part = fresh[start:start + batch_size]
+                results = collection.get(where={"source": {"$in": part}}, include=["embeddings", "metadatas"])
+                if len(results['ids']):
+                    vectors = normalize(results['embeddings'])
+                    if self._meta('dim') is None:
+                        self._set_meta('dim', vectors.shape[1])
+                    f.write(vectors.tobytes())
+                    self._conn.executemany(
+                        "INSERT INTO rows (row, id, source) VALUES (?, ?, ?)",
+                        ((rows + i, chunk_id, metadata['source'])
+                         for i, (chunk_id, metadata) in enumerate(zip(results['ids'], results['metadatas'])))
+                    )
+                    rows += len(results['ids'])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sources (source, content_hash) VALUES (?, ?)",
+                    ((path, current[path]) for path in part)
+                )
+            f.flush()
+
+        self._set_meta('generation', generation)
+        self._conn.commit()
+
+        # codes cover every row before anything maps them, compact() included
+        if self.quantized:
+            self._extend_codes()
+
+        dead = self._conn.execute("SELECT COUNT(*) FROM rows WHERE alive = 0").fetchone()[0]
+        if rows and dead / rows > self.COMPACT_RATIO:
+            self.compact()
+        else:
+            self._open()
+        return len(fresh)
+
+    def _extend_codes(self, block_rows: int = 65536):
+        """Quantize the rows appended since the codes were last written, with the existing scales."""
+        dim = self._meta('dim')
+        rows = self._row_count()
+        if not dim or not rows:
+            return
+        scales = np.fromfile(self._scales_path, dtype=np.float32)
+        matrix = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(rows, dim))
+
+        with open(self._codes_path, 'ab') as f:
+            # drop codes of rows that are not in the table (an interrupted refresh)
+            done = min(f.tell() // dim, rows)
+            f.truncate(done * dim)
+            f.seek(done * dim)
+            for start in range(done, rows, block_rows):
+                f.write(quantize(matrix[start:start + block_rows], scales).tobytes())
+
+    def quantize(self, block_rows: int = 65536):
+        """
+        (Re)build the int8 codes of every row, with scales fitted to the current rows.
+        Once built, the codes are kept up to date by refresh() and compact().
+        """
+        self._open()
+        if self.matrix is None:
+            return
+
+        scales = quantization_scales(self.matrix, block_rows)
+        tmp_path = self._codes_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for start in range(0, len(self.matrix), block_rows):
+                f.write(quantize(self.matrix[start:start + block_rows], scales).tobytes())
+
+        self.codes = None
+        os.replace(tmp_path, self._codes_path)
+        scales.tofile(self._scales_path)
+        self._open()
+
+    def footprint(self) -> dict:
+        """Bytes of the float32 rows and of their int8 codes (0 if not quantized)."""
+        return {
+            'float32': os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0,
+            'int8': os.path.getsize(self._codes_path) if self.quantized and os.path.exists(self._codes_path) else 0,
+        }
+
+    def compact(self, block_rows: int = 65536):
+        """Rewrite the vector file without dead rows, renumbering the remaining ones."""
+        self._open()
+        tmp_path = self._vectors_path + ".tmp"
+
+        alive = np.ones(self._row_count(), dtype=bool)
+        alive[self.dead] = False
+        with open(tmp_path, 'wb') as f:
+            if self.matrix is not None:
+                for start in range(0, len(alive), block_rows):
+                    block = self.matrix[start:start + block_rows]
+                    f.write(np.ascontiguousarray(block[alive[start:start + block_rows]]).tobytes())
+
+        self._conn.executescript("""
+            DELETE FROM rows WHERE alive = 0;
+            CREATE TABLE rows_compacted AS
+                SELECT ROW_NUMBER() OVER (ORDER BY row) - 1 AS row, id, source, alive FROM rows;
+            DELETE FROM rows;
+            INSERT INTO rows (row, id, source, alive) SELECT row, id, source, alive FROM rows_compacted;
+            DROP TABLE rows_compacted;
+        """)
+        self.matrix = None
+        os.replace(tmp_path, self._vectors_path)
+        self._conn.commit()
+
+        # refit the scales to the surviving rows
+        if self.quantized:
+            self.quantize(block_rows)
+        else:
+            self._open()
+
+    def close(self):
+        """Unmap the vector files and close the row table."""
+        self.matrix = None
+        self.codes = None
+        self._conn.close()
+
+    def _ids(self, rows: Sequence[int]) -> List[str]:
+        marks = ','.join('?' * len(rows))
+        found = dict(self._conn.execute(f"SELECT row, id FROM rows WHERE row IN ({marks})", [int(r) for r in rows]))
+        return [found[int(row)] for row in rows]
+
+    def search(self, query: np.ndarray, n_results: int, quantized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank the live rows against a normalized query.
+
+        Args:
+            query: Normalized query vector
+            n_results: Number of rows to return
+            quantized: Scan the int8 codes and re-rank the best candidates at full precision
+
+        Returns:
+            (row numbers, similarities), best first
+        """
+        if not quantized:
+            return top_k(self.matrix, query, n_results, self.dead)
+
+        if self.codes is None:
+            self.quantize()
+        return quantized_top_k(self.matrix, self.codes, self.scales, query, n_results,
+                               n_results * self.RERANK_FACTOR, self.dead)
+
+    def query(self, query_embedding: Sequence[float], n_results: int = 5, quantized: bool = False) -> dict:
+        """
+        Find the chunks closest to a query embedding.
+
+        Args:
+            query_embedding: The query vector
+            n_results: Number of chunks to return
+            quantized: Scan int8 codes instead of float32 rows, building them on first use
+
+        Returns:
+            dict: Results shaped like a ChromaDB query for one query embedding
+        """
+        empty = {'ids': [[]], 'distances': [[]], 'documents': [[]], 'metadatas': [[]]}
+        if self.matrix is None:
+            return empty
+
+        rows, scores = self.search(normalize(query_embedding), n_results, quantized)
+        if not len(rows):
+            return empty
+
+        ids = self._ids(rows)
+        chunks = setup_chroma_db.get_collection().get(ids=ids, include=["documents", "metadatas"])
+        by_id = {chunk_id: i for i, chunk_id in enumerate(chunks['ids'])}
+
+        return {
+            'ids': [ids],
+            # squared L2 distance between normalized vectors, on the same scale as ChromaDB's default space
+            'distances': [[float(2 - 2 * score) for score in scores]],
+            'documents': [[chunks['documents'][by_id[i]] if i in by_id else None for i in ids]],
+            'metadatas': [[chunks['metadatas'][by_id[i]] if i in by_id else {} for i in ids]],
+        }
@@ -0,0 +1,121 @@
+from typing import List
+
+import numpy as np
+
+# aggregations of chunk scores into a file score
+AGGREGATIONS = ("max", "mean", "rrf")
+
+# reciprocal rank fusion constant: a chunk at rank r contributes 1 / (RRF_K + r)
+RRF_K = 60
+
+
+def rank_files(results: dict, n_files: int = 5, agg: str = "max", chunks_per_file: int = 3,
+               by_rank: bool = False) -> List[dict]:
+    """
+    Aggregate the chunks of one query by source file and rank the files.
+
+    Chunk similarities are derived from the distances (squared L2 between normalized
+    vectors, so similarity = 1 - distance / 2), or from the ranks, as 1 / (RRF_K + rank),
+    for lexical results (which have no distances) and hybrid results (whose order is the
+    fusion's, while the distances they keep only reflect the vector half). They are
+    combined per file in a single pass with numpy's grouped reductions:
+        max  - the file's best chunk
+        mean - the average of the file's retrieved chunks
+        rrf  - reciprocal rank fusion, summing 1 / (RRF_K + rank) over the file's chunks,
+               which rewards files with several good chunks
+
+    Args:
+        results: Query results for one query, with ids, distances, documents and metadatas,
+            ordered best first and over-fetched well beyond n_files
+        n_files: Number of files to return
+        agg: One of AGGREGATIONS
+        chunks_per_file: Number of best chunks kept for each file
+        by_rank: Score chunks by their rank even where they have a distance (lexical
+            and hybrid searches)
+
+    Returns:
+        List of {'source', 'score', 'chunks'} dicts, best file first, where chunks are
+        {'id', 'chunk_index', 'distance', 'document'} dicts, best first
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"unknown aggregation '{agg}' (expected {', '.join(AGGREGATIONS)})")
+
+    ids = results['ids'][0] if results['ids'] else []
+    if not ids:
+        return []
+
+    metadatas = results['metadatas'][0]
+    documents = results['documents'][0] if results.get('documents') else [None] * len(ids)
+    distances = results['distances'][0] if results.get('distances') else [None] * len(ids)
+
+    # results are ordered best first
+    ranks = np.arange(1, len(ids) + 1)
+    if by_rank or any(distance is None for distance in distances):
+        similarities = 1 / (RRF_K + ranks)
+    else:
+        similarities = 1 - np.asarray(distances, dtype=np.float64) / 2
+
+    sources, groups = np.unique([(m or {}).get('source', 'Unknown') for m in metadatas], return_inverse=True)
+    counts = np.bincount(groups, minlength=len(sources))
+
+    if agg == "max":
+        scores = np.full(len(sources), -np.inf)
+        np.maximum.at(scores, groups, similarities)
+    elif agg == "mean":
+        scores = np.bincount(groups, weights=similarities, minlength=len(sources)) / counts
+    else:
+        scores = np.bincount(groups, weights=1 / (RRF_K + ranks), minlength=len(sources))
+
+    # best file first; ties keep the file whose best chunk ranks first
+    first_rank = np.full(len(sources), len(ids))
+    np.minimum.at(first_rank, groups, np.arange(len(ids)))
+    top = np.lexsort((first_rank, -scores))[:n_files]
+
+    files = []
+    for file in top:
+        # members are in rank order, so the first ones are the file's best chunks
+        best = np.flatnonzero(groups == file)[:chunks_per_file]
+        files.append({
+            'source': str(sources[file]),
+            'score': float(scores[file]),
+            'chunks': [{
+                'id': ids[i],
+                'chunk_index': (metadatas[i] or {}).get('chunk_index'),
+                'distance': None if distances[i] is None else float(distances[i]),
+                'document': documents[i],
+            } for i in best],
+        })
+    return files
+
+
+def fuse(rankings: List[dict], n_results: int = 5) -> dict:
+    """
+    Merge several rankings of chunks for one query by reciprocal rank fusion: each
+    chunk scores the sum of 1 / (RRF_K + rank) over the rankings it appears in, so
+    chunks found by both the lexical and the vector search rise to the top.
+
+    Args:
+        rankings: Query results shaped like ChromaDB's, for one query, best first
+        n_results: Number of chunks to return
+
+    Returns:
+        dict: Fused results shaped like a ChromaDB query; a chunk keeps its vector
+        distance when one of the rankings has it, None otherwise
+    """
+    scores, chunks = {}, {}
+    for ranking in rankings:
+        ids = ranking['ids'][0] if ranking['ids'] else []
+        for rank, chunk_id in enumerate(ids, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1 / (RRF_K + rank)
+            distance = ranking['distances'][0][rank - 1] if ranking.get('distances') else None
+            known = chunks.get(chunk_id)
+            if known is None or (known[0] is None and distance is not None):
+                chunks[chunk_id] = (distance, ranking['documents'][0][rank - 1], ranking['metadatas'][0][rank - 1])
+
+    top = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return {
+        'ids': [top],
+        'distances': [[chunks[chunk_id][0] for chunk_id in top]],
+        'documents': [[chunks[chunk_id][1] for chunk_id in top]],
+        'metadatas': [[chunks[chunk_id][2] for chunk_id in top]],
+    }
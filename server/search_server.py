@@ -0,0 +1,129 @@
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Optional
+
+# local port of the search server (ollama itself listens on 11434)
+DEFAULT_PORT = 11435
+
+
+class SearchServer:
+    """static class running and talking to the resident search server behind `carpet serve`."""
+
+    @staticmethod
+    def serve(port: int = DEFAULT_PORT):
+        """
+        Keep the ChromaDB collection, its index and a warm model connection loaded,
+        answering search requests on http://127.0.0.1:<port> until interrupted.
+        
+        Args:
+            port: Local port to listen on
+        """
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        from database.manifest import Manifest
+        from embedding.embedder import Embedder
+
+        embedder = Embedder()
+        state = {'generation': Manifest.generation()}
+
+        # load the model and the vector index before the first real query
+        try:
+            embedder.query("warm up", n_results=1)
+        except Exception as e:
+            print(f"⚠️  Warm-up query failed: {e}")
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._reply(200, {'status': 'ok', 'pid': os.getpid()})
+                else:
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/search":
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+
+                    # another process embedded or deleted files: reload the index
+                    generation = Manifest.generation()
+                    if generation != state['generation']:
+                        embedder.reload()
+                        state['generation'] = generation
+
+                    engine, mode = request.get('engine', 'hnsw'), request.get('mode', 'vector')
+                    if request.get('files'):
+                        results = embedder.query_files(request['query'], int(request['files']),
+                                                       agg=request.get('agg', 'max'), engine=engine, mode=mode)
+                    else:
+                        results = embedder.query(request['query'], n_results=int(request.get('n_results', 5)),
+                                                 engine=engine, mode=mode)
+                    self._reply(200, {'results': results})
+                except Exception as e:
+                    self._reply(500, {'error': str(e)})
+
+        # requests are handled one at a time on this thread, which the
+        # SQLite-backed caches require
+        httpd = HTTPServer(("127.0.0.1", port), Handler)
+        print(f"🟢 carpet search server listening on http://127.0.0.1:{port} (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped search server.")
+        finally:
+            httpd.server_close()
+
+    @staticmethod
+    def forward(query_text: str, n_results: int = 5, port: int = DEFAULT_PORT,
+                timeout: float = 30.0, engine: str = "hnsw", files: Optional[int] = None,
+                agg: str = "max", mode: str = "vector") -> Optional[dict]:
+        """
+        Run a search on the search server, if one is running.
+        
+        Args:
+            query_text: The text query to search for
+            n_results: Number of chunks to return
+            port: Port the server listens on
+            timeout: Seconds to wait for the answer
+            engine: Search engine the server should use, "hnsw", "memory" or "int8"
+            files: If set, rank files instead of chunks and return this many
+            agg: How chunk scores are combined per file when ranking files
+            mode: "vector", "lexical" or "hybrid"
+            
+        Returns:
+            dict: ChromaDB query results (a list of ranked files when ranking files),
+            or None if no server is reachable
+        """
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/search",
+            data=json.dumps({'query': query_text, 'n_results': n_results, 'engine': engine,
+                             'files': files, 'agg': agg, 'mode': mode}).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        # talk to localhost directly, even when an HTTP proxy is configured
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        try:
+            with opener.open(request, timeout=timeout) as response:
+                return json.loads(response.read())['results']
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read()).get('error', str(e))) from None
+        except (urllib.error.URLError, ConnectionError):
+            # nothing listening: the caller searches locally
+            return None
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import setup_chroma_db  # noqa: E402
+from database.lexical_index import LexicalIndex  # noqa: E402
+from database.manifest import Manifest  # noqa: E402
+
+
+def _reset_connections():
+    """Forget the store singletons, so the next use opens the current CHROMA_PATH."""
+    for owner in (Manifest, LexicalIndex):
+        if owner._conn is not None:
+            owner._conn.close()
+            owner._conn = None
+    setup_chroma_db._client = None
+    setup_chroma_db._collection = None
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A throwaway store: Chroma collection, manifest and lexical index in a temporary folder."""
+    monkeypatch.setattr(setup_chroma_db, "CHROMA_PATH", str(tmp_path / "store"))
+    _reset_connections()
+    yield str(tmp_path / "store")
+    _reset_connections()
+
+
+def unit_vector(seed: int, dim: int = 8) -> list:
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def add_file(path: str, documents: list, vectors: list, content_hash: str = None):
+    """Store a file's chunks the way the embedder does: Chroma, lexical index, then the manifest."""
+    ids = [f"{path}_chunk_{i}" for i in range(len(documents))]
+    metadatas = [{"source": path, "chunk_index": i} for i in range(len(documents))]
+    setup_chroma_db.get_collection().add(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+    LexicalIndex.add(ids, documents, metadatas)
+    Manifest.record(path, size=1, mtime_ns=1, content_hash=content_hash or path,
+                    chunk_count=len(documents), model="test")
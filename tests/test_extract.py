@@ -0,0 +1,25 @@
+import pytest
+
+from extract.html.extract_html import iter_html_text
+from extract.markdown.extract_markdown import markdown_line_to_text
+
+
+@pytest.mark.parametrize("line, text", [
+    ("call get_chunks_by_file and MAX_FILE_SIZE here, 2*3*4", "call get_chunks_by_file and MAX_FILE_SIZE here, 2*3*4"),
+    ("a*b*c, x_1_2 and snake_case_name", "a*b*c, x_1_2 and snake_case_name"),
+    ("some **bold**, *italic* and _emphasized_ text.", "some bold, italic and emphasized text."),
+    ("run `_private_helper` or `x*y*z`", "run _private_helper or x*y*z"),
+    ("## See [the docs](https://example.com) for __details__", "See the docs for details"),
+])
+def test_markdown_line_to_text(line, text):
+    assert markdown_line_to_text(line) == text
+
+
+def test_html_text_keeps_the_title():
+    html = ("<html><head><title>Release notes 4.2</title><meta charset='utf-8'>"
+            "<style>body { color: red }</style><script>var x = 1;</script></head>"
+            "<body><p>Fixed the parser.</p></body></html>")
+    text = "".join(iter_html_text([html]))
+    assert "Release notes 4.2" in text
+    assert "Fixed the parser." in text
+    assert "color" not in text and "var x" not in text
@@ -0,0 +1,39 @@
+from conftest import add_file, unit_vector
+
+from database import setup_chroma_db
+from database.lexical_index import LexicalIndex
+
+
+def test_index_grown_with_the_store_is_not_rebuilt(store, monkeypatch):
+    add_file("a.txt", ["error E1234 in the parser"], [unit_vector(1)])
+    add_file("b.txt", ["nothing to see"], [unit_vector(2)])
+
+    def rebuild():
+        raise AssertionError("the index was rebuilt")
+    monkeypatch.setattr(LexicalIndex, "rebuild", rebuild)
+
+    results = LexicalIndex.query("E1234")
+    assert [m['source'] for m in results['metadatas'][0]] == ["a.txt"]
+
+
+def test_index_next_to_an_older_store_is_backfilled(store):
+    # chunks embedded before the lexical index existed
+    setup_chroma_db.get_collection().add(
+        ids=["old.txt_chunk_0"], embeddings=[unit_vector(1)], documents=["ticket ABC-42 is closed"],
+        metadatas=[{"source": "old.txt", "chunk_index": 0}]
+    )
+    add_file("new.txt", ["a fresh file"], [unit_vector(2)])
+
+    results = LexicalIndex.query("ABC-42")
+    assert [m['source'] for m in results['metadatas'][0]] == ["old.txt"]
+
+
+def test_backfill_notice_stays_off_stdout(store, capsys):
+    setup_chroma_db.get_collection().add(
+        ids=["old.txt_chunk_0"], embeddings=[unit_vector(1)], documents=["ticket ABC-42 is closed"],
+        metadatas=[{"source": "old.txt", "chunk_index": 0}]
+    )
+    LexicalIndex.query("ABC-42")
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "lexical index" in captured.err
@@ -0,0 +1,19 @@
+import sys
+
+import pytest
+
+import main
+
+
+def test_get_option_reads_and_removes_the_option(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["carpet", "search", "q", "--files", "3", "--query-ttl=1.5"])
+    assert main.get_option("files", None) == 3
+    assert main.get_option("query-ttl", None, cast=float) == 1.5
+    assert main.get_option("n-results", 5) == 5
+    assert sys.argv == ["carpet", "search", "q"]
+
+
+def test_get_option_rejects_values_that_do_not_convert(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["carpet", "search", "q", "--files", "x"])
+    with pytest.raises(SystemExit, match="Invalid value for --files: 'x'"):
+        main.get_option("files", None)
@@ -0,0 +1,51 @@
+import os
+
+from conftest import add_file, unit_vector
+from database.db_manager import DbManager
+from search.memory_index import MemoryIndex
+
+
+def _fill(files: int, chunks: int = 4):
+    for f in range(files):
+        add_file(f"/docs/f{f}.txt", [f"text {f} {i}" for i in range(chunks)],
+                 [unit_vector(f * 100 + i) for i in range(chunks)])
+
+
+def test_refresh_compacts_with_int8_codes(store):
+    _fill(8)
+    index = MemoryIndex()
+    index.refresh()
+    index.quantize()
+    assert index.codes is not None
+
+    # replace one file and remove two: the dead rows pass COMPACT_RATIO in the same refresh
+    # that appends the new rows, before their codes exist
+    DbManager.deleteByFiles(["/docs/f0.txt", "/docs/f1.txt", "/docs/f2.txt"])
+    add_file("/docs/f0.txt", ["changed 0", "changed 1"], [unit_vector(900), unit_vector(901)], "new-hash")
+    index.refresh()
+
+    assert len(index.matrix) == 5 * 4 + 2
+    assert len(index.dead) == 0
+    assert os.path.getsize(index._codes_path) == index.matrix.size
+
+    result = index.query(unit_vector(900), n_results=1, quantized=True)
+    assert result['ids'] == [["/docs/f0.txt_chunk_0"]]
+
+    # a later refresh and a fresh instance both open the index
+    assert index.refresh() == 0
+    assert MemoryIndex().query(unit_vector(301), n_results=1, quantized=True)['ids'] == [["/docs/f3.txt_chunk_1"]]
+
+
+def test_open_ignores_codes_shorter_than_the_rows(store):
+    _fill(3)
+    index = MemoryIndex()
+    index.refresh()
+    index.quantize()
+    with open(index._codes_path, 'r+b') as f:
+        f.truncate(8)
+
+    index = MemoryIndex()
+    assert index.codes is None
+    # the first quantized search rebuilds them
+    assert index.query(unit_vector(201), n_results=1, quantized=True)['ids'] == [["/docs/f2.txt_chunk_1"]]
+    assert index.codes is not None
@@ -0,0 +1,39 @@
+from search.ranking import fuse, rank_files
+
+
+def _results(chunks, with_distances=True):
+    """Query results from (source, chunk_index, distance) triples, best first."""
+    return {
+        'ids': [[f"{source}_chunk_{index}" for source, index, _ in chunks]],
+        'distances': [[distance for _, _, distance in chunks]] if with_distances else [[None] * len(chunks)],
+        'documents': [[f"text of {source} {index}" for source, index, _ in chunks]],
+        'metadatas': [[{'source': source, 'chunk_index': index} for source, index, _ in chunks]],
+    }
+
+
+def test_vector_files_are_ranked_by_distance():
+    results = _results([("f1", 0, 0.2), ("f2", 0, 0.9), ("f1", 1, 0.3)])
+    files = rank_files(results, n_files=2)
+    assert [f['source'] for f in files] == ["f1", "f2"]
+    assert files[0]['score'] == 1 - 0.2 / 2
+
+
+def test_hybrid_files_follow_the_fused_ranking():
+    # the vector search prefers f1, but f2 holds the exact term the lexical search found
+    vector = _results([("f1", 0, 0.2), ("f1", 1, 0.3), ("f3", 0, 0.5), ("f2", 0, 1.5)])
+    lexical = _results([("f2", 0, None), ("f4", 0, None)], with_distances=False)
+    fused = fuse([vector, lexical], n_results=10)
+    assert fused['ids'][0][0] == "f2_chunk_0"
+    # the fused chunk keeps its (poor) vector distance
+    assert fused['distances'][0][0] == 1.5
+
+    for agg in ("max", "mean"):
+        files = rank_files(fused, n_files=3, agg=agg, by_rank=True)
+        assert files[0]['source'] == "f2", agg
+    # rrf sums over chunks, so f1's two chunks may outweigh f2's one, but f2 stays in
+    assert "f2" in [f['source'] for f in rank_files(fused, n_files=3, agg="rrf", by_rank=True)]
+
+
+def test_lexical_files_are_ranked_by_rank():
+    results = _results([("f2", 3, None), ("f1", 0, None), ("f1", 1, None)], with_distances=False)
+    assert [f['source'] for f in rank_files(results, n_files=2)] == ["f2", "f1"]
@@ -0,0 +1,40 @@
+from concurrent.futures import Future
+
+from conftest import unit_vector
+
+from database.manifest import Manifest
+from ingestion.ingestor import Ingestor
+from ingestion.watcher import Watcher
+from profiling.progress import Progress
+
+
+def test_file_failing_once_is_embedded_by_the_next_change(store, tmp_path):
+    folder = tmp_path / "notes"
+    folder.mkdir()
+    path = folder / "a.txt"
+    path.write_text("first version")
+
+    ingestor = Ingestor(cache_size=0, progress=Progress("quiet"))
+    attempts = []
+
+    def submit(texts):
+        future = Future()
+        attempts.append(texts)
+        if len(attempts) == 1:
+            future.set_exception(ConnectionError("model unavailable"))
+        else:
+            future.set_result([unit_vector(i) for i in range(len(texts))])
+        return future
+
+    ingestor.embedder.embedding_client.submit = submit
+    watcher = Watcher(str(folder), ingestor, backend="poll")
+    try:
+        watcher.apply([str(path)])
+        assert Manifest.get(str(path)) is None
+
+        path.write_text("second version")
+        watcher.apply([str(path)])
+        assert len(attempts) == 2
+        assert Manifest.get(str(path)) is not None
+    finally:
+        ingestor.close()